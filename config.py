@@ -1,15 +1,54 @@
 # Settings for API
-from datetime import datetime
 
-# Start year is current year - 19 years
-start_year = datetime.now().year - 19
-end_year = datetime.now().year
-current_month = datetime.now().month - 1
+# Years requested before the current year, the Updater takes the current year when it is created
+history_years = 19
 
 # Url for BLS and EIA website
 url_bls = 'https://api.bls.gov/publicAPI/v2/timeseries/data/'
 url_eia = 'https://api.eia.gov/v2'
 
+# Settings for the concurrent requests to the APIs
+max_workers = 8
+request_retries = 4
+request_timeout = 30
+
+# Limits of a single BLS v2 request for registered users
+bls_max_series = 50
+bls_max_years = 20
+
+# Rows in one page of an EIA v2 response, 5000 is the most the API returns, and bytes read at a time from a response
+eia_page_length = 5000
+stream_chunk_size = 64 * 1024
+
+# Number of months before the latest stored month requested again on an incremental update, to pick up revisions.
+# The STEO routes also hold a forecast past the current month, which changes with every release, so their window is
+# counted back from the last month of actual data and covers the whole forecast horizon after it
+revision_months = 3
+
+# Background refresh of the dashboard data, the refresher only runs the Updater if run_updater is True
+# Every process checks the Feather store for a new version each watch_interval seconds, while the Updater runs at most
+# once every refresh_interval seconds in whichever process holds the update lock
+auto_refresh = False
+refresh_interval = 60 * 60
+watch_interval = 60
+run_updater = False
+
+# Number of pages kept in the figure cache of the dashboard, each month range selected adds a page
+figure_cache_size = 32
+
+# Decimals kept in the figures sent to the browser, and number of points kept for each line, None to keep every point
+figure_decimals = 4
+figure_max_points = 500
+
+# Seasonal period of the STL decompositions on the Forecasting page
+stl_period = 12
+
+# Largest lag of the ACF and PACF stored for every series
+acf_max_lag = 50
+
+# Number of new months after which the stored forecasting models are fitted from scratch instead of reused
+refit_months = 12
+
 # Series ID used by the BLS API to pull data
 bls_food = [
     'APU0000708111', 'APU0000709112', 'APU0000702111', 'APU0000704111', 'APU0000FF1101',
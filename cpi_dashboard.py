@@ -1,7 +1,7 @@
 # Import libraries
-from layout import app
+from layout import app, server, start_refresher
 
 
 if __name__ == "__main__":
+    start_refresher()
     app.run_server()
-
@@ -0,0 +1,108 @@
+"""
+Splits BLS requests so each one stays within the limits of the BLS v2 API
+
+A registered BLS v2 request can ask for at most 50 series and 20 years. The series list and the year range are cut into
+chunks that respect both limits, the chunks are requested concurrently, and the responses are stitched back into one
+dataframe aligned on year_month.
+"""
+import json
+import config
+from data_processing.preprocessing.normalize import bls_months, record_columns, to_numbers
+from data_processing.series_store import SeriesStore
+
+
+def chunk(items, size):
+    """
+    :param items: List to split
+    :param size: Maximum length of each chunk
+    :return: List of lists
+    """
+
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def plan_requests(bls_series, start_year, end_year, max_series=config.bls_max_series, max_years=config.bls_max_years):
+    """
+    Builds the list of requests needed to cover every series over the whole year range
+    :param bls_series: List of series id
+    :param start_year: First year to request
+    :param end_year: Last year to request
+    :param max_series: Maximum number of series in one request
+    :param max_years: Maximum number of years in one request
+    :return: List of dict with the seriesid, startyear and endyear for each request
+    """
+
+    year_ranges = [(year, min(year + max_years - 1, end_year)) for year in range(start_year, end_year + 1, max_years)]
+
+    return [
+        {'seriesid': series_chunk, 'startyear': str(first_year), 'endyear': str(last_year)}
+        for series_chunk in chunk(list(bls_series), max_series)
+        for first_year, last_year in year_ranges
+    ]
+
+
+def parse_series(series_data):
+    """
+    Converts the observations of one series into months and values, annual averages (M13) are skipped
+    :param series_data: List of dict with the year, period and value of each observation
+    :return: Pandas PeriodIndex of the months and numpy float64 array of the values, nan where the BLS has no value
+    """
+
+    columns = record_columns(series_data, ['year', 'period', 'value'])
+    months = bls_months(columns['year'], columns['period'])
+    monthly = ~months.isna()
+
+    return months[monthly], to_numbers(columns['value'])[monthly]
+
+
+def stitch_responses(responses, bls_series, bls_series_name):
+    """
+    Joins the responses of every request into one dataframe
+    :param responses: List of decoded json responses
+    :param bls_series: List of series id, sets the order of the columns
+    :param bls_series_name: Column name for each series id
+    :return: Pandas dataframe with one column per series and year_month, newest month first
+    """
+
+    records = {series_id: [] for series_id in bls_series}
+
+    for response in responses:
+        if response.get('status') != 'REQUEST_SUCCEEDED':
+            raise ValueError('BLS request failed: ' + ' '.join(response.get('message', [])))
+
+        for series in response['Results']['series']:
+            records[series['seriesID']] += series['data']
+
+    # The year chunks of each series are parsed together, then the series are joined on their months
+    store = SeriesStore()
+    for series_id, name in zip(bls_series, bls_series_name):
+        store.add(name, *parse_series(records[series_id]))
+
+    bls_df = store.join(bls_series_name).iloc[::-1]
+    bls_df['year_month'] = bls_df.index.strftime('%Y-%m')
+
+    return bls_df.reset_index(drop=True)
+
+
+def retrieve_bls(fetcher, url, bls_series, bls_series_name, start_year, end_year, registration_key):
+    """
+    Requests every chunk concurrently and stitches the responses
+    :param fetcher: Fetcher used to send the requests
+    :param url: Url of the BLS API
+    :param bls_series: List of series id
+    :param bls_series_name: Column name for each series id
+    :param start_year: First year to request
+    :param end_year: Last year to request
+    :param registration_key: BLS API key
+    :return: Pandas dataframe with one column per series and year_month
+    """
+
+    headers = {'Content-type': 'application/json'}
+
+    def post(payload):
+        return fetcher.post_json(url, data=json.dumps({**payload, 'registrationkey': registration_key}),
+                                 headers=headers)
+
+    responses = fetcher.map(post, plan_requests(bls_series, start_year, end_year))
+
+    return stitch_responses(responses, bls_series, bls_series_name)
@@ -0,0 +1,135 @@
+"""
+Concurrent requests for the BLS and EIA APIs
+
+Every series is its own request, so the requests are sent from a thread pool over one pooled session instead of one
+after another. Failed requests are retried with exponential backoff using tenacity.
+"""
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+import config
+
+
+def is_retryable(exception):
+    """
+    Connection problems, time outs, rate limits and server errors are worth retrying, anything else is raised
+    :param exception: Exception raised by the request
+    :return: True if the request should be sent again
+    """
+
+    if isinstance(exception, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+
+    if isinstance(exception, requests.HTTPError) and exception.response is not None:
+        return exception.response.status_code == 429 or exception.response.status_code >= 500
+
+    return False
+
+
+class Fetcher:
+
+    def __init__(self, max_workers=config.max_workers, retries=config.request_retries,
+                 timeout=config.request_timeout):
+        """
+        :param max_workers: Maximum number of requests in flight at the same time
+        :param retries: Number of attempts for each request
+        :param timeout: Seconds to wait for the server before giving up on an attempt
+        """
+
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+
+        # One connection pool per host, large enough for every worker to keep its connection alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def retrying(self):
+        """
+        :return: Tenacity retrying loop with exponential backoff for the errors worth retrying
+        """
+
+        return Retrying(
+            retry=retry_if_exception(is_retryable),
+            stop=stop_after_attempt(self.retries),
+            wait=wait_exponential(multiplier=0.5, max=10),
+            reraise=True
+        )
+
+    def request_json(self, method, url, **kwargs):
+        """
+        Sends one request, retrying it with exponential backoff
+        :param method: HTTP method, get or post
+        :param url: Url of the request
+        :param kwargs: Passed to requests
+        :return: Decoded json body
+        """
+
+        for attempt in self.retrying():
+            with attempt:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                response.raise_for_status()
+
+        return response.json()
+
+    def get_stream(self, url, parse, chunk_size=config.stream_chunk_size):
+        """
+        Sends a get request and parses the body while it is received, without holding the whole body in memory
+        The body is parsed inside the retry loop, so a connection lost halfway through the body is retried too
+        :param url: Url of the request
+        :param parse: Function that takes in an iterable of bytes with the body and returns the parsed result
+        :param chunk_size: Bytes read at a time
+        :return: Result of parse
+        """
+
+        for attempt in self.retrying():
+            with attempt:
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    response.raise_for_status()
+                    result = parse(response.iter_content(chunk_size))
+
+        return result
+
+    def get_json(self, url):
+        """
+        :param url: Url of the request
+        :return: Decoded json body
+        """
+
+        return self.request_json('get', url)
+
+    def post_json(self, url, data, headers=None):
+        """
+        :param url: Url of the request
+        :param data: Body of the request
+        :param headers: Headers of the request
+        :return: Decoded json body
+        """
+
+        return self.request_json('post', url, data=data, headers=headers)
+
+    def map(self, func, items):
+        """
+        Calls the function for every item from the thread pool
+        :param func: Function that sends one request
+        :param items: List of arguments, one per request
+        :return: List of results in the same order as the items
+        """
+
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    def get_all(self, urls):
+        """
+        Sends a get request for every url concurrently
+        :param urls: List of urls
+        :return: List of decoded json bodies in the same order as the urls
+        """
+
+        return self.map(self.get_json, urls)
@@ -0,0 +1,95 @@
+"""
+Autocorrelations of every series in a data snapshot
+
+The ACF and PACF of each numeric series of the merged dataframe are computed once per snapshot up to
+config.acf_max_lag, together with their 95% confidence bands, and written next to the Feather files of the snapshot.
+The Forecasting page slices the stored arrays to the number of lags it shows instead of running statsmodels on every
+request.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import config
+from data_processing.data_store import atomic_write
+
+
+# Rows of the array stored for each series
+correlation_rows = ['acf', 'pacf', 'acf_band', 'pacf_band']
+
+
+def series_correlations(series, max_lag, alpha=0.05):
+    """
+    :param series: Pandas series
+    :param max_lag: Largest lag computed
+    :param alpha: Significance level of the confidence bands
+    :return: 2D array with one row per name in correlation_rows and one column per lag, starting at lag 0
+    """
+
+    # Imported here so a process that only reads the stored correlations never loads statsmodels
+    from scipy.stats import norm
+    from statsmodels.tsa.stattools import acf, pacf
+
+    acf_values, acf_interval = acf(series, nlags=max_lag, fft=True, alpha=alpha)
+    pacf_values = pacf(series, nlags=max_lag)
+
+    # Bartlett band for the ACF, the PACF band is the same for every lag
+    acf_band = acf_interval[:, 1] - acf_values
+    pacf_band = np.full(max_lag + 1, norm.ppf(1 - alpha / 2) / np.sqrt(len(series)))
+    acf_band[0] = pacf_band[0] = 0
+
+    return np.vstack([acf_values, pacf_values, acf_band, pacf_band])
+
+
+class CorrelationStore:
+
+    def __init__(self, folder, data, max_lag=config.acf_max_lag):
+        """
+        Loads the correlations of the snapshot from the store, computing and writing them first if they are missing
+        :param folder: Version folder of the snapshot in the Feather store
+        :param data: Pandas dataframe with the series
+        :param max_lag: Largest lag computed
+        """
+
+        self.max_lag = max_lag
+        path = os.path.join(folder, f'correlations_{max_lag}.feather')
+
+        if os.path.exists(path):
+            table = feather.read_feather(path)
+        else:
+            table = self.compute(data)
+
+            atomic_write(path, lambda temp_path: feather.write_feather(table, temp_path, compression='uncompressed'))
+
+        self.values = {
+            column: table[[column + '|' + row for row in correlation_rows]].to_numpy().T
+            for column in dict.fromkeys(name.split('|')[0] for name in table.columns)
+        }
+
+    def compute(self, data):
+        """
+        :param data: Pandas dataframe with the series
+        :return: Pandas dataframe with one column per series and row of correlation_rows, one row per lag
+        """
+
+        table = {}
+
+        for column in data.select_dtypes('number').columns:
+            values = series_correlations(data[column], self.max_lag)
+
+            for row, name in zip(values, correlation_rows):
+                table[column + '|' + name] = row
+
+        return pd.DataFrame(table)
+
+    def get(self, column, lag):
+        """
+        :param column: Name of the series
+        :param lag: Number of lags shown
+        :return: Dict with the acf, pacf, acf_band and pacf_band arrays from lag 0 to lag
+        """
+
+        if lag > self.max_lag:
+            raise ValueError(f'Only {self.max_lag} lags are stored, set config.acf_max_lag to at least {lag}')
+
+        return dict(zip(correlation_rows, self.values[column][:, :lag + 1]))
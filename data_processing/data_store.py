@@ -0,0 +1,245 @@
+"""
+Columnar copy of the csv files in the data folder
+
+The csv files stay the source of truth. Every version of them is converted into a folder of uncompressed Feather files
+with typed columns, the rows sorted oldest month first and year_month stored as the first day of the month, and the
+CURRENT file points to the latest folder. The dashboard loads the Feather files through a memory map, so the gunicorn
+workers share the pages through the OS cache and skip parsing the csv files on every boot. Since a version folder is
+complete before CURRENT is switched to it, a process loading the data never sees a mix of old and new files.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import pandas as pd
+import pyarrow.feather as feather
+
+
+# Folder inside the data folder where the Feather files are written
+store_folder = 'store'
+
+# Layout of the Feather files, part of the version id so a change of the layout rewrites the versions already stored
+# 2: rows sorted oldest month first
+store_format = 2
+
+# Number of version folders kept, older ones are deleted when a new version is written
+versions_kept = 3
+
+
+def data_version(data_dir):
+    """
+    Builds a version id of the csv files from their names, sizes and modified times and the layout of the Feather files
+    :param data_dir: Path to the folder with the csv files
+    :return: Hex string that changes whenever a csv file or the layout changes
+    """
+
+    fingerprint = hashlib.sha1(f'format:{store_format};'.encode())
+
+    for file_name in sorted(os.listdir(data_dir)):
+        if file_name.endswith('.csv'):
+            file_stat = os.stat(os.path.join(data_dir, file_name))
+            fingerprint.update(f'{file_name}:{file_stat.st_size}:{file_stat.st_mtime_ns};'.encode())
+
+    return fingerprint.hexdigest()[:16]
+
+
+def csv_names(data_dir):
+    """
+    :param data_dir: Path to the folder with the csv files
+    :return: Names of the csv files without the extension
+    """
+
+    return sorted(file_name[:-4] for file_name in os.listdir(data_dir) if file_name.endswith('.csv'))
+
+
+def store_path(data_dir, version, name=None):
+    """
+    :param data_dir: Path to the folder with the csv files
+    :param version: Version id of the csv files
+    :param name: Name of the csv file without the extension
+    :return: Path to the version folder, or to the Feather file for the csv file if a name is given
+    """
+
+    folder = os.path.join(data_dir, store_folder, version)
+
+    return folder if name is None else os.path.join(folder, name + '.feather')
+
+
+def atomic_write(path, write):
+    """
+    Writes a file to a temporary path next to it and renames it over the path once it is complete, so a process reading
+    the path never sees a half written file. The temporary name is unique to the process and thread writing it, so two
+    writers of the same file never write into each other's temporary file.
+    :param path: Path to the file
+    :param write: Function that takes in the temporary path and writes the file there
+    """
+
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_source_csv(csv_path):
+    """
+    Reads one of the csv files written by the Updater and fixes the columns
+    - Drops the index column saved by to_csv
+    - Drops the repeated year_month columns from the forecast data
+    - Converts year_month into the first day of the month
+    - Sorts the rows oldest month first, the csv files are kept newest month first, so the snapshot can index the
+      memory mapped columns without sorting them into a copy
+    :param csv_path: Path to the csv file
+    :return: Pandas dataframe
+    """
+
+    df = pd.read_csv(csv_path)
+    df = df.loc[:, [column for column in df.columns
+                    if not column.startswith('Unnamed:') and not column.startswith('year_month.')]]
+    df['year_month'] = pd.to_datetime(df['year_month'], format='%Y-%m')
+
+    return df.sort_values(by='year_month', kind='stable').reset_index(drop=True)
+
+
+def current_version(data_dir):
+    """
+    :param data_dir: Path to the folder with the csv files
+    :return: Version id in the CURRENT file, None if nothing was written yet
+    """
+
+    try:
+        with open(os.path.join(data_dir, store_folder, 'CURRENT')) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(data_dir):
+    """
+    Converts every csv file into a new version folder and points CURRENT to it
+    :param data_dir: Path to the folder with the csv files
+    :return: Version id of the new folder
+    """
+
+    version = data_version(data_dir)
+    folder = store_path(data_dir, version)
+
+    if not os.path.isdir(folder):
+        # Written to a temporary folder first so a worker never maps a half written version
+        temp_folder = folder + '.tmp' + str(os.getpid())
+        os.makedirs(temp_folder, exist_ok=True)
+
+        for name in csv_names(data_dir):
+            feather.write_feather(read_source_csv(os.path.join(data_dir, name + '.csv')),
+                                  os.path.join(temp_folder, name + '.feather'), compression='uncompressed')
+
+        try:
+            os.rename(temp_folder, folder)
+        except OSError:
+            # Another process wrote the same version first
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
+    atomic_write(os.path.join(data_dir, store_folder, 'CURRENT'), lambda temp_path: write_text(temp_path, version))
+
+    remove_old_versions(data_dir, version)
+
+    return version
+
+
+def write_text(path, text):
+    """
+    :param path: Path to the file
+    :param text: Content of the file
+    """
+
+    with open(path, 'w') as file:
+        file.write(text)
+
+
+def remove_old_versions(data_dir, keep):
+    """
+    Deletes the oldest version folders, the memory maps of running processes stay valid after the files are deleted
+    :param data_dir: Path to the folder with the csv files
+    :param keep: Version id that is never deleted
+    """
+
+    root = os.path.join(data_dir, store_folder)
+    folders = [os.path.join(root, folder) for folder in os.listdir(root)
+               if os.path.isdir(os.path.join(root, folder)) and '.tmp' not in folder]
+    folders.sort(key=os.path.getmtime, reverse=True)
+
+    for folder in folders[versions_kept:]:
+        if os.path.basename(folder) != keep:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def ensure_snapshot(data_dir):
+    """
+    Returns the version in CURRENT, converting the csv files first if they changed since it was written
+    :param data_dir: Path to the folder with the csv files
+    :return: Version id
+    """
+
+    version = current_version(data_dir)
+
+    if version is None or version != data_version(data_dir) or not os.path.isdir(store_path(data_dir, version)):
+        version = write_snapshot(data_dir)
+
+    return version
+
+
+def load_frame(name, data_dir='./data', version=None):
+    """
+    Loads a dataset from the Feather store
+    :param name: Name of the csv file without the extension
+    :param data_dir: Path to the folder with the csv files
+    :param version: Version id to load, defaults to the current version
+    :return: Pandas dataframe
+    """
+
+    table = feather.read_table(store_path(data_dir, version or ensure_snapshot(data_dir), name), memory_map=True)
+
+    # split_blocks lets pyarrow hand the numeric columns to pandas without copying them out of the memory map
+    return table.to_pandas(split_blocks=True)
+
+
+def latest_month(data_dir, name):
+    """
+    :param data_dir: Path to the folder with the csv files
+    :param name: Name of the csv file without the extension
+    :return: Latest year_month in the csv file as a monthly pandas period, None if there is no csv file yet
+    """
+
+    path = os.path.join(data_dir, name + '.csv')
+
+    if not os.path.exists(path):
+        return None
+
+    return pd.Period(pd.read_csv(path, usecols=['year_month'])['year_month'].max(), freq='M')
+
+
+def upsert_csv(data_dir, name, new_df):
+    """
+    Adds the new months to a csv file and replaces the months that are already in it, newest month first
+    :param data_dir: Path to the folder with the csv files
+    :param name: Name of the csv file without the extension
+    :param new_df: Pandas dataframe with the same columns as the csv file and year_month as YYYY-mm
+    :return: Number of rows written
+    """
+
+    path = os.path.join(data_dir, name + '.csv')
+
+    if os.path.exists(path):
+        old_df = pd.read_csv(path, index_col=0)
+        old_df = old_df.loc[~old_df['year_month'].isin(new_df['year_month'])]
+        new_df = pd.concat([new_df[old_df.columns], old_df], ignore_index=True)
+
+    new_df = new_df.sort_values(by='year_month', ascending=False).reset_index(drop=True)
+
+    atomic_write(path, new_df.to_csv)
+
+    return len(new_df)
@@ -0,0 +1,118 @@
+"""
+Cache of the STL decompositions shown on the Forecasting page
+
+A decomposition only depends on the series, the months it covers and the STL parameters, so it is computed once per
+data snapshot and written next to the Feather files of the snapshot. The dashboard fills the cache when a snapshot is
+loaded, a request only reads the trend, seasonal and residual components back from memory.
+"""
+import hashlib
+import os
+import re
+import threading
+import pandas as pd
+import pyarrow.feather as feather
+import config
+from data_processing.data_store import atomic_write
+
+
+# Folder inside the version folder where the decompositions are written
+decomposition_folder = 'stl'
+
+
+def stl(new_df, period=12):
+    """
+    Decomposes a series with STL, used by the dashboard and the forecasting models
+    :param new_df: Pandas series to decompose
+    :param period: Seasonal period
+    :return: Pandas dataframe with the trend, seasonal and residuals columns, indexed like the series
+    """
+
+    # Imported here so a process that only reads the stored decompositions never loads statsmodels
+    from statsmodels.tsa.seasonal import STL
+
+    stl = STL(new_df, period=period)
+    stl = stl.fit()
+    result = pd.DataFrame(
+        {'trend': stl.trend,
+         'seasonal': stl.seasonal,
+         'residuals': stl.resid
+         }
+    )
+
+    return result
+
+
+class DecompositionCache:
+
+    def __init__(self, folder):
+        """
+        :param folder: Version folder of the snapshot in the Feather store
+        """
+
+        self.folder = os.path.join(folder, decomposition_folder)
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def file_path(self, key):
+        """
+        :param key: Tuple with the series name, first month, last month and STL period
+        :return: Path to the Feather file of the decomposition
+        """
+
+        name, start, end, period = key
+        slug = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:8]
+
+        return os.path.join(self.folder, f'{slug}_{start}_{end}_p{period}_{digest}.feather')
+
+    def get(self, data, column, period=config.stl_period):
+        """
+        Returns the decomposition of a series, loading it from the store or computing it if it is not in memory
+        :param data: Pandas dataframe with year_month and the series, sorted by year_month
+        :param column: Name of the series
+        :param period: Seasonal period of the STL
+        :return: Pandas dataframe with the trend, seasonal and residuals columns, in the same order as data
+        """
+
+        key = (column, data['year_month'].min().strftime('%Y-%m'), data['year_month'].max().strftime('%Y-%m'), period)
+        components = self.cache.get(key)
+
+        if components is None:
+            with self.lock:
+                components = self.cache.get(key)
+
+                if components is None:
+                    components = self.load_or_compute(key, data[column], period)
+                    self.cache[key] = components
+
+        return components
+
+    def load_or_compute(self, key, series, period):
+        """
+        :param key: Tuple with the series name, first month, last month and STL period
+        :param series: Pandas series to decompose
+        :param period: Seasonal period of the STL
+        :return: Pandas dataframe with the trend, seasonal and residuals columns
+        """
+
+        path = self.file_path(key)
+
+        if os.path.exists(path):
+            return feather.read_feather(path)
+
+        components = stl(series, period).reset_index(drop=True)
+
+        os.makedirs(self.folder, exist_ok=True)
+        atomic_write(path, lambda temp_path: feather.write_feather(components, temp_path, compression='uncompressed'))
+
+        return components
+
+    def warm(self, frames, period=config.stl_period):
+        """
+        Computes the decompositions ahead of time, used at startup and after a new snapshot is swapped in
+        :param frames: List of tuples with the dataframe and the name of the series
+        :param period: Seasonal period of the STL
+        """
+
+        for data, column in frames:
+            self.get(data, column, period)
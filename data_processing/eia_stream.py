@@ -0,0 +1,320 @@
+"""
+Streaming parser for the EIA v2 API responses
+
+An EIA response holds its rows in response.data, one dict per month and facet. Instead of decoding the whole body and
+copying every dict into lists, the body is read in chunks, each row is decoded on its own and its values are written
+straight into preallocated numpy columns. A request only holds the columns and one chunk of the body in memory, however
+many rows it returns.
+
+The API returns at most config.eia_page_length rows per response, the rows past the first page are requested with the
+offset of each following page.
+"""
+import codecs
+import json
+import re
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+import pandas as pd
+import config
+
+
+# Type of the numpy column written for each kind of field, periods and categories are written as codes into the list
+# of distinct values, the few hundred distinct periods are only converted to dates once the rows are read
+column_types = {
+    'period': 'int32',
+    'number': 'float64',
+    'category': 'int32'
+}
+
+# Spaces allowed between json values
+whitespace = re.compile(r'[ \t\n\r]*')
+
+
+def eia_columns(url):
+    """
+    Columns kept from the rows of an EIA route, the data fields and facets are read from the query of the url
+    :param url: Url of the EIA route
+    :return: Dict with the name and the kind of each column: period, number or category
+    """
+
+    columns = {'period': 'period'}
+
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key.startswith('data['):
+            columns[value] = 'number'
+        elif key.startswith('facets['):
+            columns[key[len('facets['):key.index(']')]] = 'category'
+
+    return columns
+
+
+def page_url(url, offset, length=config.eia_page_length):
+    """
+    :param url: Url of the EIA route without offset and length
+    :param offset: Position of the first row of the page
+    :param length: Number of rows in the page
+    :return: Url of the page
+    """
+
+    return f'{url}&offset={offset}&length={length}'
+
+
+class TextReader:
+
+    def __init__(self, chunks):
+        """
+        Reads json values one at a time from a body received in chunks
+        :param chunks: Iterable of bytes with the json body
+        """
+
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.finished = False
+
+    def read_more(self):
+        """
+        Appends the next chunk to the buffer, dropping the part already read
+        :return: False if the body has been read to the end
+        """
+
+        if self.finished:
+            return False
+
+        chunk = next(self.chunks, None)
+        text = self.decoder.decode(chunk or b'', final=chunk is None)
+        self.finished = chunk is None
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+
+        return True
+
+    def peek(self):
+        """
+        :return: Next character that is not a space without reading it, empty string at the end of the body
+        """
+
+        while True:
+            self.position = whitespace.match(self.buffer, self.position).end()
+
+            if self.position < len(self.buffer) or not self.read_more():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, character):
+        """
+        :param character: Character the body must continue with, it is read
+        """
+
+        found = self.peek()
+
+        if found != character:
+            raise ValueError(f'Expected {character!r} in the EIA response, found {found!r}')
+
+        self.position += 1
+
+    def value(self):
+        """
+        :return: Next json value of the body, decoded
+        """
+
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value goes past the end of the buffer
+                if self.read_more():
+                    continue
+                raise
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.read_more():
+                continue
+
+            self.position = end
+            return value
+
+    def items(self):
+        """
+        Iterates over the keys of the object that starts at the current position, the caller reads each value
+        :return: Generator of keys
+        """
+
+        self.expect('{')
+
+        while True:
+            if self.peek() == '}':
+                self.position += 1
+                return
+
+            if self.peek() == ',':
+                self.position += 1
+
+            key = self.value()
+            self.expect(':')
+
+            yield key
+
+    def elements(self):
+        """
+        Iterates over the values of the array that starts at the current position
+        :return: Generator of decoded values
+        """
+
+        self.expect('[')
+
+        while True:
+            character = self.peek()
+
+            if character == ']':
+                self.position += 1
+                return
+
+            if character == ',':
+                self.position += 1
+
+            yield self.value()
+
+
+class ColumnWriter:
+
+    def __init__(self, columns, size):
+        """
+        :param columns: Dict with the name and the kind of each column
+        :param size: Number of rows allocated up front, the columns grow if more rows are written
+        """
+
+        self.columns = columns
+        self.size = 0
+        self.arrays = {name: np.empty(max(size, 1), dtype=column_types[kind]) for name, kind in columns.items()}
+        self.categories = {name: {} for name, kind in columns.items() if kind != 'number'}
+
+    def append(self, row):
+        """
+        :param row: Dict with the fields of one row of the response
+        """
+
+        if self.size == len(self.arrays['period']):
+            for name, array in self.arrays.items():
+                self.arrays[name] = np.resize(array, 2 * len(array))
+
+        for name, kind in self.columns.items():
+            value = row.get(name)
+
+            if kind == 'number':
+                value = to_number(value)
+            else:
+                categories = self.categories[name]
+                value = -1 if value is None else categories.setdefault(value, len(categories))
+
+            self.arrays[name][self.size] = value
+
+        self.size += 1
+
+    def frame(self):
+        """
+        :return: Pandas dataframe with the rows written, category columns are pandas categoricals
+        """
+
+        data = {}
+
+        for name, kind in self.columns.items():
+            array = self.arrays[name][:self.size]
+
+            if kind == 'category':
+                data[name] = pd.Categorical.from_codes(array, categories=list(self.categories[name]))
+            elif kind == 'period':
+                # Code -1 takes the NaT appended after the distinct periods
+                periods = np.array(list(self.categories[name]) + ['NaT'], dtype='datetime64[D]')
+                data[name] = periods[array]
+            else:
+                data[name] = array
+
+        return pd.DataFrame(data)
+
+
+def to_number(value):
+    """
+    :param value: Number or string from the EIA response, values like NA or -- have no number
+    :return: Float, nan if there is no number
+    """
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_eia(chunks, columns, size=config.eia_page_length):
+    """
+    Reads one EIA response, writing the rows of response.data into numpy columns as they are decoded
+    :param chunks: Iterable of bytes with the json body
+    :param columns: Dict with the name and the kind of each column
+    :param size: Expected number of rows, the total of the response is used instead if it comes before the rows
+    :return: Pandas dataframe with the rows, and the total number of rows of the query over every page
+    """
+
+    reader = TextReader(chunks)
+    writer = None
+    total = None
+
+    for key in reader.items():
+        if key != 'response':
+            reader.value()
+            continue
+
+        for response_key in reader.items():
+            if response_key == 'total':
+                total = int(reader.value())
+            elif response_key == 'data':
+                writer = ColumnWriter(columns, min(total or size, size))
+                for row in reader.elements():
+                    writer.append(row)
+            else:
+                reader.value()
+
+    if writer is None:
+        raise ValueError('The EIA response has no response.data')
+
+    return writer.frame(), writer.size if total is None else total
+
+
+def retrieve_eia(fetcher, urls, length=config.eia_page_length):
+    """
+    Requests every EIA route concurrently, with one request per page of rows
+    :param fetcher: Fetcher used to send the requests
+    :param urls: List of urls of EIA routes without offset and length
+    :param length: Number of rows in one page
+    :return: List of pandas dataframes, one per url, with the period, the data fields and the facets of every row
+    """
+
+    def get_page(item):
+        url, offset = item
+        columns = eia_columns(url)
+        return fetcher.get_stream(page_url(url, offset, length), lambda chunks: parse_eia(chunks, columns, length))
+
+    first_pages = fetcher.map(get_page, [(url, 0) for url in urls])
+
+    # Routes with more rows than one page need the other pages too
+    other_items = [
+        (url, offset)
+        for url, (_, total) in zip(urls, first_pages)
+        for offset in range(length, total, length)
+    ]
+    other_pages = dict(zip(other_items, fetcher.map(get_page, other_items)))
+
+    frames = []
+    for url, (frame, total) in zip(urls, first_pages):
+        pages = [frame] + [other_pages[(url, offset)][0] for offset in range(length, total, length)]
+
+        if len(pages) > 1:
+            categories = [name for name, kind in eia_columns(url).items() if kind == 'category']
+            frame = pd.concat(pages, ignore_index=True)
+            frame[categories] = frame[categories].astype('category')
+
+        frames.append(frame)
+
+    return frames
@@ -1,132 +1,244 @@
 """This file is used to retrieve data from the US BLS and US EIA website using their public API"""
-# This file does work, just uncomment to use
-
-# # Importing libraries
-# import requests
-# import json
-# import api_keys
-# import config
-# import pandas as pd
-# from data_processing.preprocessing.data_checking import data_check
-# import data_processing.preprocessing.misc_func as misc_func
-#
-#
-# class Updater:
-#
-#     def __init__(self):
-#         self.bls_url = config.url_bls
-#         self.eia_url = config.url_eia
-#         self.start_year = config.start_year
-#         self.end_year = config.end_year
-#         print('BLS URL: ' + self.bls_url)
-#         print('EIA URL: ' + self.eia_url)
-#         print('Start Year: ' + str(self.start_year))
-#         print('End Year: ' + str(self.end_year))
-#
-#     # API to retrieve data from the US BLS website
-#     def retrieve_data_bls(self, bls_series, bls_series_name):
-#         """
-#         Takes in a list of series id and retrieve their data values from the website
-#         :param: List of series id in strings
-#         :return: Pandas Dataframe
-#         """
-#
-#         # Requesting data through API
-#         headers = {'Content-type': 'application/json'}
-#         data = json.dumps({'seriesid': bls_series,
-#                            'startyear': self.start_year,
-#                            'endyear': self.end_year,
-#                            "registrationkey": api_keys.bls_api_key})
-#
-#         p = requests.post(self.bls_url, data=data, headers=headers)
-#         json_data = json.loads(p.text)
-#
-#         # Get the data from a list of dictionaries into a nested list
-#         # Then the nested list is put into a dataframe
-#         bls_df = misc_func.dict_to_df(json_data['Results']['series'], ['data', 'value'])
-#         bls_df.columns = bls_series_name
-#
-#         # Check the data before returning the dataframe
-#         bls_df = data_check(bls_df)
-#
-#         # Extract the value date from the series and put it as a new column into the bls df
-#         bls_df['year_month'] = misc_func.bls_parse_date(json_data['Results']['series'][0]['data'])
-#
-#         return bls_df
-#
-#
-#     # API to retrieve data from the US Energy Information Administration
-#     def retrieve_data_eia(self, eia_series, eia_series_name):
-#         """
-#         Used to retrieve data from the US EIA website using an API key
-#         :return:
-#         """
-#
-#         # Setting for the EIA API
-#         sort_value = '&sort[0][column]=period&sort[0][direction]=desc&offset=0&length=5000'  # Sort by descending order
-#         frequency = '&frequency=monthly'  # Pull data in monthly interval
-#         start_date = '&start=' + str(self.start_year) + '-01'
-#         api_key = '&api_key=' + api_keys.eia_api_key  # API key
-#
-#         # Temporary list to store all the values
-#         temp_list = []
-#
-#         # Loops through all the series needed, and request the data for each series separately
-#         for series in eia_series:
-#
-#             api_request = self.eia_url + series + sort_value + frequency + start_date + api_key
-#             r = requests.get(api_request)
-#             json_data = r.json()
-#
-#             temp_list += misc_func.dict_to_list(json_data['response']['data'], 'value')
-#
-#         # Converts the list of values into Pandas Dataframe
-#         eia_df = pd.DataFrame(temp_list).transpose()
-#
-#         # Setting column name for the dataframe
-#         eia_df.columns = eia_series_name
-#
-#         # Check the data before returning the dataframe
-#         eia_df = data_check(eia_df)
-#
-#         # Get the date period for all the values in the list
-#         eia_df['year_month'] = pd.DataFrame(misc_func.dict_to_list(json_data['response']['data'], 'period')).transpose()
-#
-#         return eia_df
-#
-#     '''
-#     # Retrieve the data from the EIA json file, temporary solution until the EIA API is working again
-#     def eia_json_to_df(self, file_path):
-#         """
-#         Take json and convert it into dataframe
-#         """
-#
-#         # Temporary list to store all the values
-#         temp_list = []
-#         country_name = []
-#
-#         # Loops through all the series needed, and request the data for each series separately
-#         with open(file_path, 'r') as file:
-#             data = json.load(file)
-#
-#             for series in data:
-#                 temp_list += misc_func.dict_to_list(series['data'], 'value')
-#                 country_name += [series['iso']]
-#
-#         # Converts the list of values into Pandas Dataframe
-#         eia_df = pd.DataFrame(temp_list).transpose()
-#
-#         # Setting column name for the dataframe
-#         eia_df.columns = country_name
-#
-#         # Setting the time column
-#         eia_df['year_month'] = pd.read_csv('data/eia_crude_consumption.csv')['year_month'].iloc[::-1].reset_index(drop=True)
-#
-#         # Check the data before returning the dataframe
-#         eia_df = data_check(eia_df)
-#
-#         return eia_df
-#         '''
+# The Updater needs an api_keys.py file with the API keys, uncomment the code at the bottom to update the csv files
+
+# Importing libraries
+from datetime import datetime
+import config
+import pandas as pd
+from data_processing.bls_planner import retrieve_bls
+from data_processing.concurrent_fetch import Fetcher
+from data_processing.data_store import latest_month, upsert_csv
+from data_processing.eia_stream import retrieve_eia
+from data_processing.preprocessing.data_checking import data_check
+from data_processing.series_store import SeriesStore
+
+# api_keys.py holds bls_api_key and eia_api_key and is kept out of the repo
+try:
+    import api_keys
+except ImportError:
+    api_keys = None
+
+
+def production_double_counting(eia_prod):
+    """
+    The regional production totals include the countries that have their own column, they are removed from the totals
+    :param eia_prod: Pandas dataframe of the crude oil production
+    :return: Pandas dataframe
+    """
+
+    eia_prod = eia_prod.copy()
+    eia_prod['Non-OECD'] = eia_prod['Non-OECD'] - eia_prod['China'] - eia_prod['Russia'] - eia_prod['OPEC']
+    eia_prod['OECD'] = eia_prod['OECD'] - eia_prod['Canada'] - eia_prod['United States'] - eia_prod['Mexico']
+
+    return eia_prod
+
+
+def consumption_double_counting(eia_cons):
+    """
+    The regional consumption totals include the countries that have their own column, they are removed from the totals
+    :param eia_cons: Pandas dataframe of the crude oil consumption
+    :return: Pandas dataframe
+    """
+
+    eia_cons = eia_cons.copy()
+    eia_cons['Non-OECD'] = eia_cons['Non-OECD'] - eia_cons['China'] - eia_cons['Russia']
+    eia_cons['OECD'] = eia_cons['OECD'] - eia_cons['Canada'] - eia_cons['United States'] - eia_cons['Mexico']
+
+    return eia_cons
+
+
+def revision_start(latest, series, revision_months=config.revision_months):
+    """
+    First month requested again on an incremental update, the BLS and EIA revise their recent values
+    :param latest: Latest month in the csv file as a monthly period
+    :param series: List of series id or EIA routes of the csv file
+    :param revision_months: Number of months requested again before the latest month of actual data
+    :return: Monthly period
+    """
+
+    # The STEO holds forecasts up to the end of next year, every release revises them along with the last months of
+    # actual data, which end the month before the current one
+    if any('/steo/' in item for item in series):
+        latest = min(latest, pd.Period.now('M') - 1)
+
+    return latest - revision_months
+
+
+# Csv files written by the Updater: name, source, series, column names, transform
+datasets = [
+    ('bls_food', 'bls', config.bls_food, config.bls_food_name, None),
+    ('bls_gas_price', 'bls', config.bls_gas, config.bls_gas_name, None),
+    ('eia_crude_price', 'eia', config.eia_petroleum_price, config.eia_petroleum_name, None),
+    ('eia_crude_production', 'eia', config.eia_crude_production, config.eia_crude_production_name,
+     production_double_counting),
+    ('eia_crude_consumption', 'eia', config.eia_crude_consumption, config.eia_crude_consumption_name,
+     consumption_double_counting),
+    ('eia_emission', 'eia', config.eia_petro_emission, config.eia_petro_emission_name, None),
+]
+
+
+class Updater:
+
+    def __init__(self):
+        if api_keys is None:
+            raise ImportError('api_keys.py with bls_api_key and eia_api_key is needed to retrieve data')
+
+        self.fetcher = Fetcher()
+        self.bls_url = config.url_bls
+        self.eia_url = config.url_eia
+        # Taken when the Updater is created, the refresher creates one per update so a server running over the new
+        # year requests it
+        self.end_year = datetime.now().year
+        self.start_year = self.end_year - config.history_years
+        print('BLS URL: ' + self.bls_url)
+        print('EIA URL: ' + self.eia_url)
+        print('Start Year: ' + str(self.start_year))
+        print('End Year: ' + str(self.end_year))
+
+    # API to retrieve data from the US BLS website
+    def retrieve_data_bls(self, bls_series, bls_series_name, start_year=None):
+        """
+        Takes in a list of series id and retrieve their data values from the website
+        :param: List of series id in strings
+        :param start_year: First year to request, defaults to the start year of the Updater
+        :return: Pandas Dataframe
+        """
+
+        # Requesting data through API, split into chunks that stay within the BLS limits
+        bls_df = retrieve_bls(self.fetcher, self.bls_url, bls_series, bls_series_name,
+                              start_year or self.start_year, self.end_year, api_keys.bls_api_key)
+        year_month = bls_df.pop('year_month')
+
+        # Check the data before returning the dataframe
+        bls_df = data_check(bls_df)
+
+        # Put the value date back as a new column into the bls df
+        bls_df['year_month'] = year_month
+
+        return bls_df
+
+
+    # API to retrieve data from the US Energy Information Administration
+    def retrieve_data_eia(self, eia_series, eia_series_name, start_month=None):
+        """
+        Used to retrieve data from the US EIA website using an API key
+        :param start_month: First month to request as YYYY-mm, defaults to January of the start year of the Updater
+        :return:
+        """
+
+        # Setting for the EIA API, the offset and length of each page are added when the pages are requested
+        sort_value = '&sort[0][column]=period&sort[0][direction]=desc'  # Sort by descending order
+        frequency = '&frequency=monthly'  # Pull data in monthly interval
+        start_date = '&start=' + (start_month or str(self.start_year) + '-01')
+        api_key = '&api_key=' + api_keys.eia_api_key  # API key
+
+        # Every series is requested separately, the requests are sent concurrently and the responses are parsed into
+        # numpy columns while they are received
+        api_requests = [self.eia_url + series + sort_value + frequency + start_date + api_key for series in eia_series]
+        frames = retrieve_eia(self.fetcher, api_requests)
+
+        # Every series is joined on its own months, a series missing some months leaves them empty instead of shifting
+        # its values onto the months of the other series
+        store = SeriesStore()
+        for name, frame in zip(eia_series_name, frames):
+            store.add(name, frame['period'], frame['value'])
+
+        # Newest month first, in the order the API sends the rows
+        eia_df = store.join(eia_series_name).iloc[::-1]
+        year_month = eia_df.index.strftime('%Y-%m')
+        eia_df = eia_df.reset_index(drop=True)
+
+        # Check the data before returning the dataframe
+        eia_df = data_check(eia_df)
+
+        # Put the month of each row back as a new column
+        eia_df['year_month'] = year_month
+
+        return eia_df
+
+    def update_dataset(self, name, source, series, series_name, transform=None, incremental=True,
+                       data_dir='./data', revision_months=config.revision_months):
+        """
+        Requests the data for one of the csv files and writes it into the data folder
+        In incremental mode only the months after the latest month in the csv file are requested, plus a few months
+        before it since the BLS and EIA revise their recent values, the forecasts of the STEO routes are all requested
+        again
+        :param name: Name of the csv file without the extension
+        :param source: 'bls' or 'eia'
+        :param series: List of series id or EIA routes
+        :param series_name: Column name for each series
+        :param transform: Function applied to the new rows before they are written
+        :param incremental: Only request the missing months if True, the whole history if False
+        :param data_dir: Path to the folder with the csv files
+        :param revision_months: Number of months before the latest month of actual data that are requested again
+        :return: Number of months written into the csv file from the API
+        """
+
+        latest = latest_month(data_dir, name) if incremental else None
+        start = None if latest is None else revision_start(latest, series, revision_months)
+
+        if source == 'bls':
+            new_df = self.retrieve_data_bls(series, series_name, None if start is None else start.year)
+        else:
+            new_df = self.retrieve_data_eia(series, series_name, None if start is None else str(start))
+
+        if start is not None:
+            # The BLS can only be asked for whole years, the months before the revision window are dropped
+            new_df = new_df.loc[new_df['year_month'] >= str(start)]
+
+        if transform is not None:
+            new_df = transform(new_df)
+
+        upsert_csv(data_dir, name, new_df)
+
+        return len(new_df)
+
+    def update_all(self, data_dir='./data', incremental=True):
+        """
+        Updates every csv file used by the dashboard
+        :param data_dir: Path to the folder with the csv files
+        :param incremental: Only request the missing months if True, the whole history if False
+        :return: Dict with the number of months written for each csv file
+        """
+
+        return {
+            name: self.update_dataset(name, source, series, series_name, transform, incremental, data_dir)
+            for name, source, series, series_name, transform in datasets
+        }
+
+    '''
+    # Retrieve the data from the EIA json file, temporary solution until the EIA API is working again
+    def eia_json_to_df(self, file_path):
+        """
+        Take json and convert it into dataframe
+        """
+
+        # Temporary list to store all the values
+        temp_list = []
+        country_name = []
+
+        # Loops through all the series needed, and request the data for each series separately
+        with open(file_path, 'r') as file:
+            data = json.load(file)
+
+            for series in data:
+                temp_list += [[item.get('value') for item in series['data']]]
+                country_name += [series['iso']]
+
+        # Converts the list of values into Pandas Dataframe
+        eia_df = pd.DataFrame(temp_list).transpose()
+
+        # Setting column name for the dataframe
+        eia_df.columns = country_name
+
+        # Setting the time column
+        eia_df['year_month'] = pd.read_csv('data/eia_crude_consumption.csv')['year_month'].iloc[::-1].reset_index(drop=True)
+
+        # Check the data before returning the dataframe
+        eia_df = data_check(eia_df)
+
+        return eia_df
+        '''
 
 #data = Updater()
 # eia_prod = data.eia_json_to_df('data/eia_prod_data.json')
@@ -137,26 +249,6 @@
 # eia_prod.iloc[:, :-1] = eia_prod.iloc[:, :-1]/float(1000.00)
 # eia_prod.to_csv('data/eia_prod_data.csv')
 
+# Only requests the months that are missing from the csv files, use incremental=False to request the whole history
 # data = Updater()
-# bls_food = data.retrieve_data_bls(config.bls_food, config.bls_food_name)
-# bls_gas = data.retrieve_data_bls(config.bls_gas, config.bls_gas_name)
-# bls_food.to_csv('data/bls_food.csv')
-# bls_gas.to_csv('data/bls_gas_price.csv')
-#
-# eia_petro_price = data.retrieve_data_eia(config.eia_petroleum_price, config.eia_petroleum_name)
-# eia_petro_price.to_csv('data/eia_crude_price.csv')
-#
-# # Prevent double counting
-# eia_prod = data.retrieve_data_eia(config.eia_crude_production, config.eia_crude_production_name)
-# eia_prod['Non-OECD'] = eia_prod['Non-OECD'] - eia_prod['China'] - eia_prod['Russia'] - eia_prod['OPEC']
-# eia_prod['OECD'] = eia_prod['OECD'] - eia_prod['Canada'] - eia_prod['United States'] - eia_prod['Mexico']
-# eia_prod.to_csv('data/eia_crude_production.csv')
-#
-# # Prevent double counting
-# eia_cons = data.retrieve_data_eia(config.eia_crude_consumption, config.eia_crude_consumption_name)
-# eia_cons['Non-OECD'] = eia_cons['Non-OECD'] - eia_cons['China'] - eia_cons['Russia']
-# eia_cons['OECD'] = eia_cons['OECD'] - eia_cons['Canada'] - eia_cons['United States'] - eia_cons['Mexico']
-# eia_cons.to_csv('data/eia_crude_consumption.csv')
-#
-# eia_emission = data.retrieve_data_eia(config.eia_petro_emission, config.eia_petro_emission_name)
-# eia_emission.to_csv('data/eia_emission.csv')
+# data.update_all('./data', incremental=True)
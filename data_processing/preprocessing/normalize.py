@@ -0,0 +1,102 @@
+"""
+Columnar normalization of the BLS and EIA API responses
+
+The responses hold their observations as lists of dicts. Every field needed is taken from the dicts in one pass into
+numpy columns, numbers are converted for the whole column at once, and the BLS year and period fields are turned into
+monthly periods with array arithmetic on the few distinct years and periods instead of joining strings row by row.
+
+BLS periods M01 to M12 are months, M13 is the annual average published with some series. Annual averages and any other
+period that is not a month get no month.
+"""
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+
+def record_columns(records, keys):
+    """
+    Takes the values of the given keys from every dict in one pass
+    :param records: List of dict
+    :param keys: List of keys, a key missing from a dict gives None
+    :return: Dict with a numpy object array for each key
+    """
+
+    if not records:
+        return {key: np.empty(0, dtype=object) for key in keys}
+
+    # Dicts missing a key are filled with None, itemgetter raises on a missing key
+    getter = itemgetter(*keys)
+    try:
+        rows = [getter(record) for record in records]
+    except KeyError:
+        rows = [tuple(record.get(key) for key in keys) for record in records]
+
+    if len(keys) == 1:
+        rows = [(row,) for row in rows]
+
+    columns = {}
+    for key, values in zip(keys, zip(*rows)):
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        columns[key] = column
+
+    return columns
+
+
+def to_numbers(values):
+    """
+    :param values: Array of numbers or strings, the BLS writes missing values as '-'
+    :return: Numpy float64 array, nan for the values that are not numbers
+    """
+
+    try:
+        return np.asarray(values, dtype=object).astype('float64')
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype='float64')
+
+
+def distinct_map(values, convert):
+    """
+    Converts each distinct value once, the BLS fields only have a few distinct years and periods
+    :param values: Array of values
+    :param convert: Function that takes in a numpy array of distinct values and returns a float array
+    :return: Numpy float64 array with the converted value of every item
+    """
+
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    converted = np.append(np.asarray(convert(np.asarray(uniques, dtype=object)), dtype='float64'), np.nan)
+
+    # Code -1 marks a missing value and takes the nan appended above
+    return converted[codes]
+
+
+def period_month(periods):
+    """
+    :param periods: Numpy array of BLS periods
+    :return: Numpy float64 array with the month of each period, nan for M13 and the periods that are not months
+    """
+
+    months = np.array([float(period[1:]) if isinstance(period, str) and period[:1] == 'M' and period[1:].isdigit()
+                       else np.nan for period in periods])
+
+    return np.where((months >= 1) & (months <= 12), months, np.nan)
+
+
+def bls_months(years, periods):
+    """
+    Converts the year and period fields of the BLS into months
+    :param years: Array of years as strings or numbers
+    :param periods: Array of BLS periods, M01 to M12 are months
+    :return: Pandas PeriodIndex with monthly frequency, NaT for M13 annual averages and other non monthly periods
+    """
+
+    months = distinct_map(periods, period_month)
+    years = distinct_map(years, to_numbers)
+
+    # Months since 1970-01, the ordinal of a numpy datetime64[M]
+    ordinals = (years - 1970) * 12 + months - 1
+    missing = np.isnan(ordinals)
+    ordinals = np.where(missing, np.iinfo('int64').min, np.nan_to_num(ordinals)).astype('int64')
+
+    return pd.DatetimeIndex(ordinals.view('datetime64[M]').astype('datetime64[ns]')).to_period('M')
+
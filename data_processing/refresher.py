@@ -0,0 +1,140 @@
+"""
+Background thread that keeps the dashboard data up to date without restarting the server
+
+On every run the thread can update the csv files with the Updater, then writes a new version into the Feather store
+and swaps the new snapshot into the SnapshotHolder. Processes that do not run the Updater only watch the store and pick
+up the versions written by the one that does.
+
+Every gunicorn worker runs its own refresher, so only the process holding an exclusive lock on store/UPDATE.lock runs
+the Updater, and only if the UPDATED stamp next to it is older than the refresh interval. The stamp is written after
+every run, failed or not. The other workers skip the update and pick up the new version on their next watch.
+"""
+import os
+import threading
+import time
+import traceback
+import config
+from data_processing.data_store import current_version, store_folder, write_snapshot, write_text
+from data_processing.snapshot import DataSnapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows, where only the development server runs in a single process
+    fcntl = None
+
+
+def update_due(data_dir, interval):
+    """
+    :param data_dir: Path to the data folder
+    :param interval: Seconds between two updates
+    :return: True if no process has run the Updater in the last interval seconds
+    """
+
+    try:
+        return time.time() - os.path.getmtime(os.path.join(data_dir, store_folder, 'UPDATED')) >= interval
+    except FileNotFoundError:
+        return True
+
+
+def run_locked(data_dir, run):
+    """
+    Runs a function while holding the update lock of the data folder, without waiting for it
+    :param data_dir: Path to the data folder
+    :param run: Function run under the lock
+    :return: True if the lock was taken and the function ran, False if another process holds the lock
+    """
+
+    folder = os.path.join(data_dir, store_folder)
+    os.makedirs(folder, exist_ok=True)
+
+    with open(os.path.join(folder, 'UPDATE.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+        # Released when the file is closed, also if run raises
+        run()
+
+    return True
+
+
+class Refresher(threading.Thread):
+
+    def __init__(self, holder, interval=config.watch_interval, run_updater=config.run_updater, on_swap=None,
+                 update_interval=config.refresh_interval):
+        """
+        :param holder: SnapshotHolder used by the callbacks
+        :param interval: Seconds between two checks of the Feather store
+        :param run_updater: Requests new data from the APIs if True, only watches the Feather store if False
+        :param on_swap: Function called with the new snapshot after it is swapped in, used to warm the caches
+        :param update_interval: Seconds between two runs of the Updater, shared by every process using the data folder
+        """
+
+        super().__init__(name='data-refresher', daemon=True)
+        self.holder = holder
+        self.interval = interval
+        self.run_updater = run_updater
+        self.on_swap = on_swap
+        self.update_interval = update_interval
+        self.stopped = threading.Event()
+
+    def update(self, data_dir):
+        """
+        Updates the csv files and writes a new version into the Feather store, unless another process just did
+        :param data_dir: Path to the data folder
+        """
+
+        # Checked again under the lock, another process may have finished an update since the first check
+        if not update_due(data_dir, self.update_interval):
+            return
+
+        # Imported here since the Updater needs the api keys, which only the updating process has
+        from data_processing.fetch_data import Updater
+
+        try:
+            Updater().update_all(data_dir, incremental=True)
+            write_snapshot(data_dir)
+        finally:
+            # Stamped after a failed run too, so an API that is down or over its daily limit is only called again
+            # after the whole refresh interval instead of on every watch
+            write_text(os.path.join(data_dir, store_folder, 'UPDATED'), str(time.time()))
+
+    def refresh(self):
+        """
+        Runs the update if it is due and swaps the snapshot if the data changed
+        :return: True if a new snapshot was swapped in
+        """
+
+        data_dir = self.holder.current().data_dir
+
+        if self.run_updater and update_due(data_dir, self.update_interval):
+            run_locked(data_dir, lambda: self.update(data_dir))
+
+        version = current_version(data_dir)
+
+        if version is None or version == self.holder.current().version:
+            return False
+
+        # The new snapshot is fully loaded before it is swapped in
+        snapshot = DataSnapshot(data_dir, version)
+        self.holder.swap(snapshot)
+
+        if self.on_swap is not None:
+            self.on_swap(snapshot)
+
+        return True
+
+    def run(self):
+
+        while not self.stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                # A failed refresh keeps serving the current snapshot and tries again on the next run
+                traceback.print_exc()
+
+    def stop(self):
+
+        self.stopped.set()
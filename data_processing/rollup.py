@@ -0,0 +1,55 @@
+"""
+Yearly and quarterly aggregates of the EIA data
+
+The Energy Dependence charts show yearly averages of monthly data. The aggregates read by the charts are computed once
+per data snapshot for every EIA frame and shared by the charts, which never modify them.
+"""
+
+
+# Label of each period the monthly data is grouped by
+rollup_periods = {
+    'year': lambda months: months.dt.year.astype(str),
+    'quarter': lambda months: months.dt.to_period('Q').astype(str)
+}
+
+# Period and method of the aggregates built for every snapshot, only the ones read by the pages
+snapshot_rollups = [('year', 'mean')]
+
+
+def rollup(df, agg_by, method, column='year_month'):
+    """
+    Aggregates the numeric columns of a frame without modifying it
+    :param df: Pandas dataframe
+    :param agg_by: year or quarter to group the months in column, any other name groups by that column of df
+    :param method: mean or sum
+    :param column: Datetime column with the month of each row
+    :return: Pandas dataframe with the group in the first column followed by the aggregated columns
+    """
+
+    if agg_by in rollup_periods:
+        # The label is a separate series, so the frame does not get an extra column
+        grouped = df.groupby(rollup_periods[agg_by](df[column]).rename(agg_by))
+    else:
+        grouped = df.groupby([agg_by])
+
+    if method == 'mean':
+        return grouped.mean(numeric_only=True).reset_index()
+
+    if method == 'sum':
+        return grouped.sum(numeric_only=True).reset_index()
+
+    raise ValueError(f'Unknown aggregation method: {method}')
+
+
+def build_rollups(frames, rollups=snapshot_rollups):
+    """
+    :param frames: Dict with the name and the pandas dataframe of each frame
+    :param rollups: List of the period and method of each aggregate
+    :return: Dict with an aggregate for every frame, period and method, keyed by (name, period, method)
+    """
+
+    return {
+        (name, agg_by, method): rollup(df, agg_by, method)
+        for name, df in frames.items()
+        for agg_by, method in rollups
+    }
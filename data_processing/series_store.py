@@ -0,0 +1,105 @@
+"""
+Series kept as pairs of months and values, joined on their months
+
+The APIs return every series on its own, and two series do not always cover the same months: a series can start later,
+miss a month or end before the others. Each series is stored as a sorted array of month ordinals with an array of
+values, and a join places every series in the rows of its own months, so a shorter series leaves its missing months
+empty instead of shifting its values onto the months of another series.
+
+The months of the join are the union or intersection of the sorted month arrays, and each series is written into its
+rows with a binary search, without reindexing a frame per series.
+"""
+import numpy as np
+import pandas as pd
+
+
+def month_ordinals(months):
+    """
+    :param months: Array of monthly periods, dates or YYYY-mm strings
+    :return: Numpy int64 array with the number of months since 1970-01 of each month, and a boolean array marking the
+    months that are missing
+    """
+
+    if isinstance(getattr(months, 'dtype', None), pd.PeriodDtype):
+        ordinals = pd.PeriodIndex(months).asfreq('M').asi8
+    else:
+        ordinals = pd.to_datetime(pd.Series(months)).to_numpy().astype('datetime64[M]').astype('int64')
+
+    return ordinals, ordinals == np.iinfo('int64').min
+
+
+class SeriesStore:
+
+    def __init__(self):
+        """
+        Holds every series by name, with its months sorted
+        """
+
+        self.series = {}
+
+    def add(self, name, months, values):
+        """
+        Stores a series, replacing any series with the same name
+        :param name: Name of the series
+        :param months: Array of monthly periods, dates or YYYY-mm strings, in any order
+        :param values: Array of numbers, one per month
+        """
+
+        ordinals, missing = month_ordinals(months)
+        values = np.asarray(values, dtype='float64')[~missing]
+        ordinals = ordinals[~missing]
+
+        # A month given twice keeps its last value
+        order = np.argsort(ordinals, kind='stable')
+        ordinals, values = ordinals[order], values[order]
+        last = np.append(ordinals[1:] != ordinals[:-1], True)
+
+        self.series[name] = (ordinals[last], values[last])
+
+    def months(self, names, how='outer'):
+        """
+        :param names: Names of the series
+        :param how: outer for the months of any series, inner for the months of every series
+        :return: Sorted numpy int64 array of month ordinals
+        """
+
+        if not names:
+            return np.empty(0, dtype='int64')
+
+        if how == 'outer':
+            return np.unique(np.concatenate([self.series[name][0] for name in names]))
+
+        if how == 'inner':
+            months = self.series[names[0]][0]
+            for name in names[1:]:
+                months = np.intersect1d(months, self.series[name][0], assume_unique=True)
+            return months
+
+        raise ValueError(f'Unknown join: {how}')
+
+    def join(self, names=None, how='outer'):
+        """
+        Joins series on their months
+        :param names: Names of the series, in the order of the columns, defaults to every series
+        :param how: outer for the months of any series, inner for the months of every series
+        :return: Pandas dataframe with one column per series, indexed by month in ascending order, nan for the months a
+        series does not have
+        """
+
+        names = list(self.series) if names is None else list(names)
+        months = self.months(names, how)
+        table = np.full((len(months), len(names)), np.nan)
+
+        for column, name in enumerate(names):
+            ordinals, values = self.series[name]
+
+            # Rows of the series months, the months left out of an inner join are dropped
+            rows = np.searchsorted(months, ordinals)
+            found = rows < len(months)
+            found[found] = months[rows[found]] == ordinals[found]
+            table[rows[found], column] = values[found]
+
+        index = pd.PeriodIndex(pd.DatetimeIndex(months.view('datetime64[M]').astype('datetime64[ns]')), freq='M',
+                               name='month')
+
+        return pd.DataFrame(table, index=index, columns=names)
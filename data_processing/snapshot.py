@@ -0,0 +1,133 @@
+"""
+In memory version of the data used by the dashboard
+
+The callbacks read the frames from the snapshot held by a SnapshotHolder instead of module level variables, so a new
+version of the data can be swapped in while the app is running. A snapshot is never modified after it is built, a
+request keeps the snapshot it started with even if a new one is swapped in halfway through.
+
+Every frame is sorted by month and indexed by a monthly PeriodIndex, so a range of months is found with a binary search
+on the index instead of comparing year_month on every row.
+"""
+import threading
+import pandas as pd
+from data_processing.data_store import ensure_snapshot, load_frame, store_path
+from data_processing.correlation import CorrelationStore
+from data_processing.decomposition import DecompositionCache
+from data_processing.rollup import build_rollups
+from data_processing.summary import summary_table
+
+
+class DataSnapshot:
+
+    def __init__(self, data_dir, version):
+        """
+        Loads every dataset of the given version and builds the frames derived from them
+        :param data_dir: Path to the folder with the csv files
+        :param version: Version id in the Feather store
+        """
+
+        self.data_dir = data_dir
+        self.version = version
+
+        self.bls_data = month_index(load_frame('bls_food', data_dir, version))
+        self.bls_gas = month_index(load_frame('bls_gas_price', data_dir, version))
+        self.eia_petroleum_spot = month_index(load_frame('eia_crude_price', data_dir, version))
+        self.eia_api_crude_production = month_index(load_frame('eia_crude_production', data_dir, version))
+        self.eia_api_crude_consumption = month_index(load_frame('eia_crude_consumption', data_dir, version))
+        self.eia_emission = month_index(load_frame('eia_emission', data_dir, version))
+        self.eia_emission['CO2 Emission from Petroleum Products'] = \
+            self.eia_emission['CO2 Emission from Petroleum Products'] / 30
+        self.merged_df = self.bls_data.merge(self.bls_gas, how='left', on='year_month')
+        self.merged_df = month_index(self.merged_df.merge(self.eia_petroleum_spot, how='left', on='year_month'))
+        self.forecast_data = month_index(load_frame('forecast_data', data_dir, version))
+        self.decompositions = DecompositionCache(store_path(data_dir, version))
+        self.correlations = CorrelationStore(store_path(data_dir, version), self.merged_df)
+        self.summary_table = summary_table(self)
+        self.rollups = build_rollups({
+            'eia_petroleum_spot': self.eia_petroleum_spot,
+            'eia_api_crude_production': self.eia_api_crude_production,
+            'eia_api_crude_consumption': self.eia_api_crude_consumption,
+            'eia_emission': self.eia_emission
+        })
+
+    def rollup(self, name, agg_by='year', method='mean'):
+        """
+        :param name: Name of the EIA frame
+        :param agg_by: Period of one of the aggregates in rollup.snapshot_rollups
+        :param method: Method of one of the aggregates in rollup.snapshot_rollups
+        :return: Pandas dataframe with the aggregate, shared by every request so it must not be modified
+        """
+
+        return self.rollups[(name, agg_by, method)]
+
+
+def month_index(df):
+    """
+    :param df: Pandas dataframe with a year_month column
+    :return: Pandas dataframe sorted by year_month and indexed by the month, year_month is kept as a column. The frames
+    of the Feather store are already sorted, their columns are kept in the memory map instead of sorted into a copy
+    """
+
+    if df['year_month'].is_monotonic_increasing:
+        df = df.copy(deep=False)
+    else:
+        df = df.sort_values(by='year_month', kind='stable')
+
+    df.index = pd.PeriodIndex(df['year_month'], freq='M', name='month')
+
+    return df
+
+
+def month_slice(df, start=None, end=None):
+    """
+    Selects the rows between two months, both included, with a binary search on the sorted month index
+    :param df: Pandas dataframe indexed by month_index
+    :param start: First month as a pandas period or YYYY-mm, defaults to the first month of the frame
+    :param end: Last month as a pandas period or YYYY-mm, defaults to the last month of the frame
+    :return: Pandas dataframe, a view of the rows of df
+    """
+
+    first = 0 if start is None else df.index.searchsorted(pd.Period(start, freq='M'), side='left')
+    last = len(df) if end is None else df.index.searchsorted(pd.Period(end, freq='M'), side='right')
+
+    return df.iloc[first:last]
+
+
+def load_snapshot(data_dir='./data'):
+    """
+    :param data_dir: Path to the folder with the csv files
+    :return: DataSnapshot of the current version, converting the csv files first if they changed
+    """
+
+    return DataSnapshot(data_dir, ensure_snapshot(data_dir))
+
+
+class SnapshotHolder:
+
+    def __init__(self, snapshot):
+        """
+        :param snapshot: First DataSnapshot served
+        """
+
+        self.snapshot = snapshot
+        self.lock = threading.Lock()
+
+    def current(self):
+        """
+        :return: DataSnapshot currently served, callbacks should read it once per request
+        """
+
+        return self.snapshot
+
+    def swap(self, snapshot):
+        """
+        Replaces the served snapshot, requests already running keep the snapshot they read
+        :param snapshot: New DataSnapshot
+        :return: The DataSnapshot that was replaced
+        """
+
+        with self.lock:
+            old_snapshot = self.snapshot
+            self.snapshot = snapshot
+
+        return old_snapshot
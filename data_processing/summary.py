@@ -0,0 +1,81 @@
+"""
+Descriptive statistics table shown in the sidebar of the dashboard
+
+The table only depends on the data, so it is built once per data snapshot. Each value is looked up on the monthly
+index of the frames, the months compared are exact calendar month offsets from the latest month of the series.
+"""
+
+
+# Months back from the latest month for each column of the table
+month_offsets = {
+    'this_month': 0,
+    'last_month': 1,
+    'one_year': 12,
+    'five_years': 60
+}
+
+
+def month_value(df, column, month):
+    """
+    :param df: Pandas dataframe indexed by month
+    :param column: Name of the series
+    :param month: Pandas period of the month
+    :return: Value of the series in the month, None if the month is missing
+    """
+
+    value = df[column].get(month)
+
+    return None if value is None or value != value else float(value)
+
+
+def format_value(value, pattern='{:.2f}'):
+    """
+    :param value: Number or None
+    :param pattern: Format of the number
+    :return: Formatted number, N/A if there is no value
+    """
+
+    return 'N/A' if value is None else pattern.format(value)
+
+
+def summary_row(df, column, metric):
+    """
+    Builds the row of one series
+    :param df: Pandas dataframe indexed by month
+    :param column: Name of the series
+    :param metric: Name shown in the table
+    :return: Dict with a value for every column of the table, and the change over one year in percent
+    """
+
+    latest = df[column].last_valid_index()
+    values = {key: None if latest is None else month_value(df, column, latest - offset)
+              for key, offset in month_offsets.items()}
+
+    if values['this_month'] is not None and values['one_year']:
+        yoy = (values['this_month'] / values['one_year'] - 1) * 100
+    else:
+        yoy = None
+
+    return {
+        'metric': metric,
+        **{key: format_value(value) for key, value in values.items()},
+        'yoy': format_value(yoy, '{:+.2f}%')
+    }
+
+
+def summary_table(snapshot):
+    """
+    :param snapshot: DataSnapshot
+    :return: List of dict, one row of the table per series
+    """
+
+    bls_data = snapshot.bls_data
+    eia_petroleum_spot = snapshot.eia_petroleum_spot
+
+    return [
+        summary_row(bls_data, 'Cpi Values', 'CPI Values'),
+        summary_row(bls_data, 'PPI Values', 'PPI Values'),
+        summary_row(bls_data, 'Unemployment', 'Unemployment Rate'),
+        *[summary_row(bls_data, item, item) for item in bls_data.columns[:-4]],
+        *[summary_row(eia_petroleum_spot, item, item) for item in eia_petroleum_spot.columns[:-1]]
+    ]
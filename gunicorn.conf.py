@@ -0,0 +1,19 @@
+# Settings for gunicorn, read from the working directory when the server starts
+# The app is loaded once in the master, which reads the data snapshot and builds the pages, the figure caches and the
+# STL decompositions. The workers are forked from it and share the loaded data copy on write instead of each loading
+# their own copy.
+import os
+
+preload_app = True
+
+# Render sets WEB_CONCURRENCY and PORT, gunicorn binds to PORT on its own
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = 120
+
+
+def post_fork(server, worker):
+
+    # Threads do not survive a fork, so each worker starts its own refresher to pick up new snapshots, the Updater only
+    # runs in the worker that takes the update lock of the data folder
+    from layout import start_refresher
+    start_refresher()
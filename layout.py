@@ -1,7 +1,17 @@
 import dash
 from dash import dash_table
-from layout_functions.layout_functions import *
-from datetime import datetime, timedelta
+from dash import html
+from dash import dcc
+from layout_functions.layout_functions import header, date_picker, drop_down
+from layout_functions.commodity_prices import commodity_prices_page
+from layout_functions.energy_dependence import energy_dependence_page
+from layout_functions.forecasting import forecasting_options, forecasting_window, forecasting_page, forecasting_graph
+from layout_functions.figure_cache import FigureCache
+from layout_functions.figure_payload import serialize
+from layout_functions.http_cache import enable_http_cache
+from data_processing.snapshot import SnapshotHolder, load_snapshot, month_slice
+from data_processing.refresher import Refresher
+import config
 from dash.dependencies import Input, Output
 
 # Using apis to import data
@@ -23,17 +33,9 @@ eia_api_crude_consumption = data_api.retrieve_data_eia(config.eia_crude_consumpt
 '''
 
 # Reading data due to it is faster to load this than computing it everytime for Render
-bls_data = pd.read_csv('./data/bls_food.csv')
-bls_gas = pd.read_csv('./data/bls_gas_price.csv')
-eia_petroleum_spot = pd.read_csv('./data/eia_crude_price.csv')
-eia_api_crude_production = pd.read_csv('./data/eia_crude_production.csv')
-eia_api_crude_consumption = pd.read_csv('./data/eia_crude_consumption.csv')
-eia_emission = pd.read_csv('./data/eia_emission.csv')
-eia_emission.iloc[:, 1] = eia_emission.iloc[:, 1] / 30
-merged_df = bls_data.drop('Unnamed: 0', axis=1).merge(
-    bls_gas.drop('Unnamed: 0', axis=1), how='left', on='year_month')
-merged_df = merged_df.merge(eia_petroleum_spot.drop('Unnamed: 0', axis=1), how='left', on='year_month')
-forecast_data = pd.read_csv('./data/forecast_data.csv')
+# The csv files are converted into memory mapped Feather files with year_month as a datetime column
+# Callbacks read the frames from the snapshot holder, so the refresher can swap in new data while the app runs
+data_holder = SnapshotHolder(load_snapshot('./data'))
 
 external_stylesheets = [
     {
@@ -44,413 +46,190 @@ external_stylesheets = [
 ]
 
 # Initialize the dash class
-app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True)
+# Responses are compressed with Brotli or gzip, whichever the browser accepts
+app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True, compress=True)
 server = app.server
+enable_http_cache(app, data_holder)
 app.title = 'CPI Dashboard'
 
-# Building the layout here
-app.layout = html.Div(
-    children=[
-        html.Div(
-            header()
-        ),
-        html.Div(
-            children=[
-                html.Div(
-                    id='sidebar',
-                    className='sidebar',
-                    children=[
-                        dcc.Markdown(
-                            '''
-                        ## About this Project
-                        This project is a dashboard for visualizing the CPI levels and different
-                        prices. 
-                        
-                        Full Code: [Github](https://github.com/thecodingmango/cpi_dashboard)
-                        
-                        Website: [TheCodingMango](https://thecodingmango.com/)
-                        
-                        Retrieving Data using EIA API: [How to Retrieve Data from the EIA Website]
-                        (https://thecodingmango.com/updating-data-for-cpi-dashboard-part-2/)
-                        
-                        Retrieving Data using BLS API: [How to Retrieve Data from the BLS Website]
-                        (https://thecodingmango.com/updating-data-for-cpi-dashboard-part-1/)
-                    '''
-                        ),
-                        html.Hr(),
-                        # Table for Descriptive Statistics
-                        dash_table.DataTable(
-                            id='descriptive_stats_table',
-                            columns=[
-                                {"name": "Metric", "id": "metric"},
-                                {"name": "This Month", "id": "this_month"},
-                                {"name": "Last Month", "id": "last_month"},
-                                {"name": "1 Year Ago", "id": "one_year"},
-                                {"name": "5 Years Ago", "id": "five_years"}
-                            ],
-                            style_table={
-                                'overflowX': 'auto',
-                                'backgroundColor': '#252a3b'
-                            },
-                            style_header={
-                                'backgroundColor': '#1E1E2F',
-                                'fontWeight': 'bold',
-                                'color': 'white'
-                            },
-                            style_cell={
-                                'textAlign': 'center',
-                                'padding': '6px',
-                                'backgroundColor': '#252a3a',
-                                'color': 'white',
-                                'border': '2px solid #444'
-                            }
-                        )
-                    ]
-                ),
-                html.Div(
-                    id='main',
-                    className='main',
-                    children=[
-                        # Date picker section
-                        html.Div(
-                            className='main_top',
-                            children=[
-                                # date_picker(bls_data),
-                                html.Label("Select Page Here"),
-                                drop_down(),
-                            ]
-                        ),
-                        # CPI chart
-                        html.Div(
-                            dcc.Loading(type='circle', children=[
-                                html.Div(
-                                    id='charts_container',
-                                    className='cpi_chart_container')
-                            ])
-                        )
-                    ]
-                )
-            ],
-            className='content_wrapper'
-        )
-    ],
-    className='wrapper'
-)
+# Building the layout here, on every page load so the month pickers cover the months of the data being served
+def serve_layout():
+
+    return html.Div(
+        children=[
+            html.Div(
+                header()
+            ),
+            html.Div(
+                children=[
+                    html.Div(
+                        id='sidebar',
+                        className='sidebar',
+                        children=[
+                            dcc.Markdown(
+                                '''
+                            ## About this Project
+                            This project is a dashboard for visualizing the CPI levels and different
+                            prices. 
+                            
+                            Full Code: [Github](https://github.com/thecodingmango/cpi_dashboard)
+                            
+                            Website: [TheCodingMango](https://thecodingmango.com/)
+                            
+                            Retrieving Data using EIA API: [How to Retrieve Data from the EIA Website]
+                            (https://thecodingmango.com/updating-data-for-cpi-dashboard-part-2/)
+                            
+                            Retrieving Data using BLS API: [How to Retrieve Data from the BLS Website]
+                            (https://thecodingmango.com/updating-data-for-cpi-dashboard-part-1/)
+                        '''
+                            ),
+                            html.Hr(),
+                            # Table for Descriptive Statistics
+                            # Filled when the page loads, the table does not change with the selected page
+                            dash_table.DataTable(
+                                id='descriptive_stats_table',
+                                data=data_holder.current().summary_table,
+                                columns=[
+                                    {"name": "Metric", "id": "metric"},
+                                    {"name": "This Month", "id": "this_month"},
+                                    {"name": "Last Month", "id": "last_month"},
+                                    {"name": "1 Year Ago", "id": "one_year"},
+                                    {"name": "5 Years Ago", "id": "five_years"},
+                                    {"name": "YoY %", "id": "yoy"}
+                                ],
+                                style_table={
+                                    'overflowX': 'auto',
+                                    'backgroundColor': '#252a3b'
+                                },
+                                style_header={
+                                    'backgroundColor': '#1E1E2F',
+                                    'fontWeight': 'bold',
+                                    'color': 'white'
+                                },
+                                style_cell={
+                                    'textAlign': 'center',
+                                    'padding': '6px',
+                                    'backgroundColor': '#252a3a',
+                                    'color': 'white',
+                                    'border': '2px solid #444'
+                                }
+                            )
+                        ]
+                    ),
+                    html.Div(
+                        id='main',
+                        className='main',
+                        children=[
+                            # Date picker section
+                            html.Div(
+                                className='main_top',
+                                children=[
+                                    date_picker(data_holder.current().bls_data),
+                                    html.Label("Select Page Here"),
+                                    drop_down(),
+                                ]
+                            ),
+                            # CPI chart
+                            html.Div(
+                                dcc.Loading(type='circle', children=[
+                                    html.Div(
+                                        id='charts_container',
+                                        className='cpi_chart_container')
+                                ])
+                            )
+                        ]
+                    )
+                ],
+                className='content_wrapper'
+            )
+        ],
+        className='wrapper'
+    )
+
+
+app.layout = serve_layout
 
 # App callback used for updating the values in the function
 @app.callback(
+    Output('charts_container', 'children'),
     [
-        Output('charts_container', 'children'),
-        Output('descriptive_stats_table', 'data'),
-    ],
-    [
-        #Input('start_month', 'value'),
-        #Input('end_month', 'value'),
+        Input('start_month', 'value'),
+        Input('end_month', 'value'),
         Input('drop_down_menu', 'value')
     ],
 )
-def update_chart(value): #(start_date, end_date, value)
-
-    start_date = bls_data['year_month'].min()
-    end_date = bls_data['year_month'].max()
-
-    filters_date_bls = ((bls_data['year_month'] >= start_date) & (bls_data['year_month'] <= end_date))
-    filtered_data_bls = bls_data.loc[filters_date_bls, :]
-
-    filtered_bls_gas = bls_gas.loc[filters_date_bls, :]
-
-    eia_filter = ((eia_petroleum_spot['year_month'] >= start_date) &
-                  (eia_petroleum_spot['year_month'] <= end_date))
-    eia_petro_price = eia_petroleum_spot.loc[eia_filter, :]
-
-    eia_filter_consumption = ((eia_api_crude_consumption['year_month'] >= start_date) &
-                              (eia_api_crude_consumption['year_month'] <= end_date))
-    eia_oil_consumption = eia_api_crude_consumption.loc[eia_filter_consumption, :]
-
-    eia_filter_production = ((eia_api_crude_production['year_month'] >= start_date) &
-                             (eia_api_crude_production['year_month'] <= end_date))
-    eia_oil_production = eia_api_crude_production.loc[eia_filter_production, :]
-
-    chart_layout = []
-
-    def get_summary(df, column):
-        if column not in df:
-            return None
-
-        end = bls_data['year_month'].max()
-        end = datetime.strptime(end, '%Y-%m')
-
-        df = df.sort_values(by='year_month')
-
-        # Calculates the value for present and past
-        curr_month = df[column].iloc[-1] if not df.empty else None
-        prev_month = df[column].iloc[-2] if len(df) > 1 else None
-        one_year = df[df['year_month'] == (end - timedelta(days=365)).strftime('%Y-%m')][column].values
-        one_year = one_year[0] if len(one_year) > 0 else None
-        five_year = df[df['year_month'] == (end - timedelta(days=365 * 5)).strftime('%Y-%m')][column].values
-        five_year = five_year[0] if len(five_year) > 0 else None
-
-        return {
-            'this_month': f"{curr_month:.2f}",
-            'last_month': f"{prev_month:.2f}",
-            'one_year': f"{one_year:.2f}",
-            'five_years': f"{five_year:.2f}"
-        }
-
-    table_data = [
-        {'metric': 'CPI Values', **get_summary(bls_data, 'Cpi Values')},
-        {'metric': 'PPI Values', **get_summary(bls_data, 'PPI Values')},
-        {'metric': 'Unemployment Rate', **get_summary(bls_data, 'Unemployment')},
-        *[{'metric': item, **get_summary(bls_data, item)} for item in filtered_data_bls.columns[1:-4]],
-        *[{'metric': item, **get_summary(eia_petroleum_spot, item)} for item in eia_petro_price.columns[1:-1]]
-    ]
-
-    if value == 'Commodity Prices':
-
-        chart_layout = []
-
-        fig_cpi = go.Figure()
-        dual_axis_line_chart(
-            fig_cpi,
-            filtered_data_bls,
-            x='year_month',
-            y1=['Cpi Values', 'PPI Values'],
-            y2=['Unemployment'],
-            title='CPI & PPI Compared to Unemployment Rate Since ' + start_date,
-            x_axis='Year',
-            y1_axis='Values (%)',
-            y2_axis='Unemployment Rate (%)'
-        )
-
-        fig_commodity = go.Figure()
-        for item in filtered_data_bls.columns[1:-4]:
-            line_graph(
-                fig_commodity,
-                filtered_data_bls,
-                'year_month',
-                item,
-                'Average Food Price Since ' + start_date, 'Year', 'Price in USD'
-            )
+def update_chart(start_month, end_month, value):
 
-        fig_crude_price = go.Figure()
-        dual_axis_line_chart(
-            fig_crude_price,
-            eia_petro_price.merge(filtered_bls_gas, how='left', on='year_month'),
-            x='year_month', y1=['UK Brent Prices', 'WTI Prices'], y2=['Unleaded Gasoline'],
-            title='Spot Prices for Crude Oil and Unleaded Gasoline', x_axis='Year',
-            y1_axis='Crude Spot Price in USD', y2_axis='Unleaded Gasoline in USD/Gallon'
-        )
-
-        fig_crude_production = go.Figure()
-        for item in eia_oil_production.columns[1:-1]:
-            line_graph(
-                fig_crude_production,
-                eia_oil_production,
-                'year_month',
-                item,
-                'Crude Oil Production Trend by Region', 'Year',
-                'Million Barrel/Day'
-            )
+    data = data_holder.current()
 
-        fig_crude_consumption = go.Figure()
-        for item in eia_oil_consumption.columns[1:-1]:
-            line_graph(
-                fig_crude_consumption,
-                eia_oil_consumption,
-                'year_month',
-                item,
-                'Crude Oil Consumption Trend by Region',
-                'Year',
-                'Million Barrels/Day')
-
-        chart_layout = [
-            html.Div(
-                children=[
-                    dcc.Interval(),
-                    html.Div(dcc.Graph(figure=fig_cpi, className='full_card')),
-                    html.Div(children=[
-                        dcc.Graph(figure=fig_commodity, className='full_card'),
-                        dcc.Graph(figure=fig_crude_price, className='full_card')
-                    ]),
-                    html.Div(children=[
-                        dcc.Graph(figure=fig_crude_production, className='full_card'),
-                        dcc.Graph(figure=fig_crude_consumption, className='full_card')
-                    ])
-                ]
+    return figure_cache.get(value, *selected_months(data, value, start_month, end_month), snapshot=data)
 
-            )
 
-        ]
-
-    elif value == 'Energy Dependence':
-
-        chart_layout = []
-
-        fig_production = map_graph(
-            eia_api_crude_production.copy(),
-            'Million Barrels/Day',
-            'Global Heatmap of Crude Oil Production Over Time'
-        )
-        fig_consumption = map_graph(
-            eia_api_crude_consumption.copy(),
-            'Million Barrels/Day',
-            'Global Heatmap of Crude Oil Consumption Over Time'
-        )
-
-        fig_bar_prod = horizontal_bar_chart(
-            eia_api_crude_production.copy(),
-            'Million Barrels/Day',
-            title='Bar Chart of Crude Oil Production',
-            x_axis='Crude Oil Production Million Barrels/Day',
-            y_axis='Region'
-        )
-
-        fig_bar_cons = horizontal_bar_chart(
-            eia_api_crude_consumption.copy(),
-            'Million Barrels/Day',
-            title='Bar Chart of Crude Oil Consumption',
-            x_axis='Crude Oil Production Million Barrels/Day',
-            y_axis='Region'
-        )
-
-        fig_stacked_area_prod = go.Figure()
-        fig_stacked_area_prod = stacked_area_graph(
-            fig_stacked_area_prod,
-            eia_api_crude_production.copy(),
-            label='Average Crude Oil Production Million Barrel/Day',
-        )
-        fig_stacked_area_prod = stacked_area_graph(
-            fig_stacked_area_prod,
-            eia_api_crude_consumption.copy(),
-            label='Average Crude Oil Consumption Million Barrel/Day',
-        )
-        fig_stacked_area_prod = stacked_area_graph(
-            fig_stacked_area_prod,
-            eia_emission.copy(),
-            y='CO2 Emission from Petroleum Products',
-            title='Yearly Oil Production, Consumption Compared to CO2 Emission from Petroleum Products',
-            label='Average CO2 Emission Million Metric Tonnes/Day',
-        )
-
-        fig_cd_consumption = cd_chart(
-            eia_api_crude_consumption.copy(),
-            eia_emission.copy(),
-            'Consumption',
-            title='Global Oil Consumption & CO₂ Emissions Over Time',
-            x_axis='Oil Consumption Million Barrels/Day',
-            y_axis='CO₂ Emissions Million Tons/Day'
-        )
-
-        fig_cd_production = cd_chart(
-            eia_api_crude_production.copy(),
-            eia_emission.copy(),
-            'Production',
-            title='Global Oil Production & CO₂ Emissions Over Time',
-            x_axis='Oil Production Million Barrels/Day',
-            y_axis='CO₂ Emissions Million Tons/Day'
-        )
-
-        chart_layout = [
-            dcc.Interval(),
-            html.Div(
-                children=[
-                    html.Div(dcc.Markdown('''
-                                # Note
-                                Countries are categorized into categories such as OPEC, OCED, Non-OCED due to
-                                limitations in data.
-                                ''')),
-                    html.Div(children=[
-                        dcc.Graph(figure=fig_production, className='full_card'),
-                        dcc.Graph(figure=fig_consumption, className='full_card')]
-                    ),
-                    html.Div(children=[
-                        dcc.Graph(figure=fig_bar_prod, className='full_card'),
-                        dcc.Graph(figure=fig_bar_cons, className='full_card')]
-                    ),
-                    html.Div(dcc.Graph(figure=fig_stacked_area_prod, className='full_card')),
-                    # html.Div(dcc.Graph(figure=fig_cd_production, className='full_card')),
-                    # html.Div(dcc.Graph(figure=fig_cd_consumption, className='full_card'))
-                ]
-            )
+def selected_months(data, value, start_month, end_month):
 
-        ]
+    # Only the Commodity Prices page is filtered by the month pickers, the other pages share one cache entry
+    if value not in ranged_pages:
+        return None, None
 
-    elif value == 'Forecasting':
+    if start_month and end_month and start_month > end_month:
+        start_month, end_month = end_month, start_month
 
-        chart_layout = [
-            html.Label("Select Series Forecast Here"),
-            html.Div(
-                dcc.Dropdown(
-                    id='forecasting_dropdown',
-                    options=[
-                        {'label': 'Consumer Price Index', 'value': 'Cpi Values'},
-                        {'label': 'Producer Price Index', 'value': 'PPI Values'},
-                        {'label': 'Unemployment Rate', 'value': 'Unemployment'},
-                        {'label': 'Unleaded Gasoline', 'value': 'Unleaded Gasoline'},
-                        {'label': 'UK Brent Prices', 'value': 'UK Brent Prices'},
-                        {'label': 'WTI Prices', 'value': 'WTI Prices'}
-                    ],
-                    value='Cpi Values',  # Default selection
-                    clearable=False
-                ),
-                className='drop_down_menu_2'
-            ),
-            html.Div(dcc.Interval()),
-            html.Div(dcc.Markdown(
-                """
-                """
-            )),
-            html.Div(id='forecasting_graph container'),  # Line chart
-        ]
+    # The whole range is the page built at startup
+    first_month, last_month = data.bls_data.index[0].strftime('%Y-%m'), data.bls_data.index[-1].strftime('%Y-%m')
+    start_month = None if not start_month or start_month <= first_month else start_month
+    end_month = None if not end_month or end_month >= last_month else end_month
 
-    else:  # Reserved for the future
+    return start_month, end_month
 
-        pass
 
-    return [chart_layout, table_data]
+# Builder of each page, every page has its own module so its charts and imports stay separate
+page_builders = {
+    'Commodity Prices': commodity_prices_page,
+    'Energy Dependence': energy_dependence_page,
+    'Forecasting': forecasting_page
+}
 
-@app.callback(
-    Output('forecasting_graph container', 'children'),
-    [Input('forecasting_dropdown', 'value')],
-    prevent_initial_update=True
-)
-def updating_forecasting_graph(value):
 
-    end = bls_data['year_month'].max()
-    end = datetime.strptime(end, '%Y-%m')
-    start = str((end - timedelta(days=365*5)).strftime('%Y-%m'))
+def build_page(value, data, start=None, end=None):
 
-    filters_date_bls = ((bls_data['year_month'] >= start) & (bls_data['year_month'] <= str(end)))
-    filtered_merged_data = merged_df.loc[filters_date_bls, :]
-    filtered_forecast_data = forecast_data.loc[filters_date_bls, :]
-    stl_data = filtered_merged_data
+    if value not in page_builders:  # Reserved for the future
+        return []
 
-    forecasting_column = [col for col in filtered_forecast_data.columns if value in col]
-    forecasting_data = filtered_forecast_data[['year_month'] + forecasting_column]
+    return page_builders[value](data, start, end)
 
-    fig_forecast_line = go.Figure()
-    line_graph(fig_forecast_line, filtered_merged_data, 'year_month', value)
 
-    for column in forecasting_column:
+def warm_snapshot(snapshot):
 
-        line_graph(
-            fig_forecast_line,
-            data=forecasting_data,
-            x='year_month',
-            y=column,
-            mode='line',
-            title='Forecasting ' + value,
-            x_axis='year',
-            y_axis='Value'
-        )
+    figure_cache.warm(pages, snapshot)
+
+    # The STL decompositions of the Forecasting page are fitted here so the callback never runs statsmodels
+    stl_data = month_slice(snapshot.merged_df, *forecasting_window(snapshot))
+    snapshot.decompositions.warm([(stl_data, option['value']) for option in forecasting_options])
 
-    return html.Div(
-        children=[
-            dcc.Graph(figure=fig_forecast_line, className='full_card'),
-            html.Div(dcc.Graph(figure=stl_chart(stl_data, x='year_month', y=value), className='full_card')),
-            html.Div(dcc.Graph(figure=acf_pacf_plot(merged_df, value, lag=50),
-                               className='full_card')),  # ACF, PACF
-    ])
 
+# Pages are built once per data snapshot and month range and served from the cache afterwards
+pages = [option['value'] for option in drop_down().options]
+ranged_pages = ['Commodity Prices']
+figure_cache = FigureCache(build_page, data_holder)
+warm_snapshot(data_holder.current())
 
+# New data is picked up in the background and the pages of a new snapshot are built right after it is swapped in
+refresher = Refresher(data_holder, on_swap=warm_snapshot)
+
+
+def start_refresher():
+
+    # Started by the process serving the requests, a gunicorn master that forks the workers never serves any
+    if config.auto_refresh and not refresher.is_alive():
+        refresher.start()
+
+
+@app.callback(
+    Output('forecasting_graph container', 'children'),
+    [Input('forecasting_dropdown', 'value')],
+    prevent_initial_update=True
+)
+def updating_forecasting_graph(value):
 
+    # Sent through the same compaction as the cached pages
+    return serialize(forecasting_graph(data_holder.current(), value))
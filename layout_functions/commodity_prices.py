@@ -0,0 +1,102 @@
+# Charts of the Inflation & Energy Prices page
+from dash import html
+from dash import dcc
+import plotly.graph_objects as go
+from data_processing.snapshot import month_slice
+from layout_functions.layout_functions import line_graph, dual_axis_line_chart
+
+
+def commodity_prices_page(data, start=None, end=None):
+
+    bls_data = data.bls_data
+    bls_gas = data.bls_gas
+    eia_petroleum_spot = data.eia_petroleum_spot
+    eia_api_crude_production = data.eia_api_crude_production
+    eia_api_crude_consumption = data.eia_api_crude_consumption
+
+    # Every frame is cut to the months of the BLS data, the EIA outlook goes past the latest BLS month
+    start = start or bls_data.index[0]
+    end = end or bls_data.index[-1]
+
+    filtered_data_bls = month_slice(bls_data, start, end)
+    filtered_bls_gas = month_slice(bls_gas, start, end)
+    eia_petro_price = month_slice(eia_petroleum_spot, start, end)
+    eia_oil_consumption = month_slice(eia_api_crude_consumption, start, end)
+    eia_oil_production = month_slice(eia_api_crude_production, start, end)
+
+    start_date = filtered_data_bls['year_month'].min()
+
+    fig_cpi = go.Figure()
+    dual_axis_line_chart(
+        fig_cpi,
+        filtered_data_bls,
+        x='year_month',
+        y1=['Cpi Values', 'PPI Values'],
+        y2=['Unemployment'],
+        title='CPI & PPI Compared to Unemployment Rate Since ' + start_date.strftime('%Y-%m'),
+        x_axis='Year',
+        y1_axis='Values (%)',
+        y2_axis='Unemployment Rate (%)'
+    )
+
+    fig_commodity = go.Figure()
+    for item in filtered_data_bls.columns[:-4]:
+        line_graph(
+            fig_commodity,
+            filtered_data_bls,
+            'year_month',
+            item,
+            'Average Food Price Since ' + start_date.strftime('%Y-%m'), 'Year', 'Price in USD'
+        )
+
+    fig_crude_price = go.Figure()
+    dual_axis_line_chart(
+        fig_crude_price,
+        eia_petro_price.merge(filtered_bls_gas, how='left', on='year_month'),
+        x='year_month', y1=['UK Brent Prices', 'WTI Prices'], y2=['Unleaded Gasoline'],
+        title='Spot Prices for Crude Oil and Unleaded Gasoline', x_axis='Year',
+        y1_axis='Crude Spot Price in USD', y2_axis='Unleaded Gasoline in USD/Gallon'
+    )
+
+    fig_crude_production = go.Figure()
+    for item in eia_oil_production.columns[:-1]:
+        line_graph(
+            fig_crude_production,
+            eia_oil_production,
+            'year_month',
+            item,
+            'Crude Oil Production Trend by Region', 'Year',
+            'Million Barrel/Day'
+        )
+
+    fig_crude_consumption = go.Figure()
+    for item in eia_oil_consumption.columns[:-1]:
+        line_graph(
+            fig_crude_consumption,
+            eia_oil_consumption,
+            'year_month',
+            item,
+            'Crude Oil Consumption Trend by Region',
+            'Year',
+            'Million Barrels/Day')
+
+    chart_layout = [
+        html.Div(
+            children=[
+                dcc.Interval(),
+                html.Div(dcc.Graph(figure=fig_cpi, className='full_card')),
+                html.Div(children=[
+                    dcc.Graph(figure=fig_commodity, className='full_card'),
+                    dcc.Graph(figure=fig_crude_price, className='full_card')
+                ]),
+                html.Div(children=[
+                    dcc.Graph(figure=fig_crude_production, className='full_card'),
+                    dcc.Graph(figure=fig_crude_consumption, className='full_card')
+                ])
+            ]
+
+        )
+
+    ]
+
+    return chart_layout
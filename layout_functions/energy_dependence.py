@@ -0,0 +1,383 @@
+# Charts of the Energy Dependence by Region page
+# plotly.express is imported by the charts that use it, so a worker only loads it once the page is built
+import hashlib
+import pandas as pd
+from dash import dcc
+from dash import html
+import plotly.graph_objects as go
+
+
+def horizontal_bar_chart(df, prod_cons, title=None, x_axis=None, y_axis=None):
+
+    import plotly.express as px
+
+    # df is the yearly mean of the data
+    df_long = df.melt(id_vars=['year'], value_vars=df.columns[1:], value_name=prod_cons)
+    df_long = df_long.sort_values(by=['year', prod_cons], ascending=[True, True])
+    global_max = df_long[prod_cons].max()
+
+    fig = px.bar(
+        df_long,
+        x=df_long[prod_cons],
+        y=df_long['variable'],
+        title=title,
+        orientation='h',
+        hover_name='variable',
+        hover_data=prod_cons,
+        animation_frame='year',
+        color=prod_cons,
+        range_color=[0, global_max],
+        range_x=[0, global_max]
+    )
+
+    fig.update_layout(
+        xaxis_title=x_axis,
+        yaxis_title=y_axis,
+        plot_bgcolor='#252a3b',
+        paper_bgcolor='#1E1E2F',
+        font=dict(color='white'),
+        transition={"duration": 500, "easing": "cubic-in-out"}
+    )
+
+    return fig
+
+
+def stacked_area_graph(fig, df, y=None, title=None, label=None):
+
+    # df is the yearly mean of the data
+    if df.shape[1] > 3:
+        fig = fig.add_trace(go.Scatter(
+            x=df['year'],
+            y=df.iloc[:, 1:-1].sum(axis=1),
+            mode='lines',
+            stackgroup='one',
+            name=label
+        ))
+
+    else:
+        fig = fig.add_trace(go.Scatter(
+            x=df['year'],
+            y=df[y],
+            mode='lines',
+            stackgroup='one',
+            name=label
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title="Year", type='category'),  # Ensure years are treated as categories
+        yaxis=dict(title="Value"),
+        plot_bgcolor="#252a3b",
+        paper_bgcolor="#1E1E2F",
+        font=dict(color="white")
+    )
+
+    return fig
+
+
+# Countries represented by each of the regional groups in the EIA data
+OECD_COUNTRIES = [
+    "Australia", "Austria", "Belgium", "Chile", "Colombia", "Costa Rica",
+    "Czech Republic", "Denmark", "Estonia", "Finland", "France",
+    "Germany", "Greece", "Hungary", "Iceland", "Ireland", "Israel",
+    "Italy", "Japan", "Latvia", "Lithuania", "Luxembourg",
+    "Netherlands", "New Zealand", "Norway", "Poland", "Portugal",
+    "Slovakia", "Slovenia", "South Korea", "Spain", "Sweden",
+    "Switzerland", "Turkey", "United Kingdom"
+]
+
+NON_OECD_COUNTRIES = [
+    "Afghanistan", "Albania", "Angola", "Antarctica", "Antigua and Barbuda",
+    "Argentina", "Armenia", "Aruba", "Azerbaijan", "Bahrain", "Bangladesh", "Barbados",
+    "Belarus", "Belize", "Benin", "Bermuda", "Bhutan", "Bolivia", "Bosnia and Herzegovina",
+    "Botswana", "Brazil", "British Virgin Islands", "Brunei", "Bulgaria", "Burkina Faso", "Myanmar",
+    "Burundi", "Cabo Verde", "Cambodia", "Cameroon", "Cayman Islands", "Central African Republic",
+    "Chad", "Comoros", "Democratic Republic of the Congo", "Cook Islands", "Ivory Coast",
+    "Croatia", "Cuba", "Cyprus", "Djibouti", "Dominica", "Dominican Republic", "Ecuador", "Egypt",
+    "El Salvador", "Eritrea", "Eswatini", "Ethiopia", "Falkland Islands", "Faroe Islands", "Fiji",
+    "French Guiana", "French Polynesia", "Gambia", "Georgia", "Ghana", "Gibraltar", "Greenland",
+    "Grenada", "Guadeloupe", "Guatemala", "Guinea", "Guinea-Bissau", "Guyana", "Haiti", "Honduras",
+    "Hong Kong", "India", "Indonesia", "Jamaica", "Jordan", "Kazakhstan", "Kenya", "Kiribati",
+    "Kosovo", "Kyrgyzstan", "Laos", "Lebanon", "Lesotho", "Liberia", "Macau", "Madagascar", "Malawi",
+    "Malaysia", "Maldives", "Mali", "Malta", "Martinique", "Mauritania", "Mauritius", "Micronesia",
+    "Moldova", "Mongolia", "Montenegro", "Morocco", "Mozambique", "Namibia", "Nauru", "Nepal",
+    "New Caledonia", "Nicaragua", "Niger", "Niue", "North Korea", "North Macedonia", "Northern Mariana Islands",
+    "Oman", "Pakistan", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines",
+    "Qatar", "Reunion", "Romania", "Rwanda", "Saint Helena", "Saint Kitts and Nevis",
+    "Saint Lucia", "Saint Pierre and Miquelon", "Saint Vincent and the Grenadines", "Samoa",
+    "Sao Tome and Principe", "Senegal", "Serbia", "Seychelles", "Sierra Leone", "Singapore",
+    "Solomon Islands", "Somalia", "South Africa", "South Sudan", "Sri Lanka", "Sudan", "Suriname",
+    "Syria", "Tajikistan", "Tanzania", "Thailand", "The Bahamas", "Timor-Leste", "Togo", "Tonga",
+    "Trinidad and Tobago", "Tunisia", "Turkmenistan", "Tuvalu", "Uganda", "Ukraine", "Uruguay",
+    "Uzbekistan", "Vanuatu", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
+]
+
+OPEC_COUNTRIES = [
+    "Algeria", "Republic of the Congo", "Equatorial Guinea", "Gabon", "Iran", "Iraq",
+    "Kuwait", "Libya", "Nigeria", "Saudi Arabia", "United Arab Emirates", "Venezuela"
+]
+
+
+def country_membership(has_opec):
+
+    # OPEC members are counted under Non-OECD when the data has no separate OPEC column
+    groups = {
+        'OECD': OECD_COUNTRIES,
+        'Non-OECD': NON_OECD_COUNTRIES + ([] if has_opec else OPEC_COUNTRIES),
+    }
+
+    if has_opec:
+        groups['OPEC'] = OPEC_COUNTRIES
+
+    return pd.DataFrame(
+        [(group, country) for group, countries in groups.items() for country in countries],
+        columns=['Group', 'Country']
+    )
+
+
+# Both versions of the membership table are built once at import
+COUNTRY_MEMBERSHIP = {has_opec: country_membership(has_opec) for has_opec in (True, False)}
+
+
+def classify_country(df, prod_cons):
+
+    membership = COUNTRY_MEMBERSHIP['OPEC' in df.columns]
+
+    # df is the yearly mean of the data
+    # Reshape data into long format
+    df_long = df.melt(id_vars=['year'], value_vars=df.columns[1:], var_name='Group', value_name=prod_cons)
+
+    # Groups are expanded to their member countries, anything else is already a country
+    df_long = df_long.merge(membership, how='left', on='Group', sort=False)
+    df_long['Country'] = df_long['Country'].fillna(df_long['Group'])
+
+    return df_long[['year', 'Country', 'Group', prod_cons]].reset_index(drop=True)
+
+
+# Country expansions already computed, keyed by the content hash of the input frame
+EXPANSION_CACHE = {}
+EXPANSION_CACHE_SIZE = 8
+
+
+def frame_hash(df):
+
+    content = pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+    return hashlib.sha1(content + str(list(df.columns)).encode()).hexdigest()
+
+
+def country_expansion(df, prod_cons):
+
+    key = (frame_hash(df), prod_cons)
+
+    expansion = EXPANSION_CACHE.get(key)
+
+    if expansion is None:
+        df_long = classify_country(df, prod_cons)
+        expansion = {'data': df_long, 'global_max': df_long[prod_cons].max()}
+
+        if len(EXPANSION_CACHE) >= EXPANSION_CACHE_SIZE:
+            EXPANSION_CACHE.clear()
+
+        # The local entry is returned, another thread may clear the cache before this one reads it back
+        EXPANSION_CACHE[key] = expansion
+
+    return expansion
+
+
+def map_graph(df, prod_cons, title):
+
+    import plotly.express as px
+
+    expansion = country_expansion(df, prod_cons)
+    global_max = expansion['global_max']
+
+    fig = px.choropleth(
+        expansion['data'],
+        locations='Country',
+        locationmode='country names',
+        color=prod_cons,
+        hover_name='Group',
+        hover_data={'Group': True, prod_cons: True},
+        title=title,
+        animation_frame='year',
+        range_color=[0, global_max],
+        color_continuous_scale=[
+        [0.0, "#FFEDA0"],  # Light Yellow
+        [0.5, "#FD8D3C"],  # Bright Orange
+        [1.0, "#B10026"] # Deep Red
+        ]
+    )
+
+    # Apply full dark theme styling and remove excess space
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='#1E1E2F',
+        font=dict(color='white'),
+        geo=dict(
+            showframe=False,
+            showcoastlines=True,
+            coastlinecolor="white",
+            showland=True,
+            landcolor='#1E1E2F',
+            showocean=True,
+            oceancolor='#252a3b',
+            showlakes=True,
+            lakecolor='#252a3b',
+            bgcolor='rgba(0,0,0,0)',
+            projection_type="equirectangular",
+            center={"lat": 10, "lon": 0},
+            lonaxis=dict(range=[-180, 180]),
+            lataxis=dict(range=[-60, 85])
+        ),
+        margin=dict(l=0, r=0, t=50, b=0),
+    )
+
+    return fig
+
+
+def cd_chart(df1, df2,prod_cons,title=None, x_axis=None, y_axis=None):
+
+    import plotly.express as px
+
+    # df1 and df2 are the yearly means of the data, df_long is a copy since its columns are rescaled below
+    df_long = df1.copy()
+
+    df_long['Total Consumption'] = df1.sum(numeric_only=True, axis=1).reset_index()[0]
+
+    df_long.iloc[:, 1:-1] = df_long.iloc[:, 1:-1].div(df_long['Total Consumption'], axis=0).mul(
+        df2.iloc[:, 1], axis=0)
+    df_long = df_long.drop('Total Consumption', axis=1)
+    df_long = df_long.melt(id_vars=['year'], value_vars=df_long.columns[1:],
+                           value_name='CO2 Emission from Petroleum Products')
+
+    df_long_2 = df1.melt(id_vars=['year'], value_vars=df1.columns[1:], value_name=prod_cons)
+
+    df_merge = df_long_2.merge(df_long, how='left', on=['year', 'variable'])
+
+    df_merge = df_merge.sort_values(by=['year', prod_cons], ascending=[True, True])
+
+    fig = px.scatter(
+        df_merge,
+        x=prod_cons,
+        y='CO2 Emission from Petroleum Products',
+        size='CO2 Emission from Petroleum Products',
+        color='variable',
+        text='variable',
+        animation_frame='year',
+        size_max=120,
+        log_x=True
+    )
+
+    fig.update_layout(
+        plot_bgcolor="#252a3b",
+        paper_bgcolor="#1E1E2F",
+        title=title,
+        font=dict(color="white"),
+        xaxis=dict(title=x_axis,range=[0, 2],showgrid=False),
+        yaxis=dict(title=y_axis, range=[0, 6],showgrid=False),
+        legend=dict(title='Country'),
+        transition={"duration": 500, "easing": "cubic-in-out"}
+    )
+
+    return fig
+
+
+def energy_dependence_page(data, start=None, end=None):
+
+    # The page always covers every year of the data, start and end are not used
+    # Yearly means computed when the snapshot is loaded, shared by every chart of the page
+    yearly_production = data.rollup('eia_api_crude_production')
+    yearly_consumption = data.rollup('eia_api_crude_consumption')
+    yearly_emission = data.rollup('eia_emission')
+
+    fig_production = map_graph(
+        yearly_production,
+        'Million Barrels/Day',
+        'Global Heatmap of Crude Oil Production Over Time'
+    )
+    fig_consumption = map_graph(
+        yearly_consumption,
+        'Million Barrels/Day',
+        'Global Heatmap of Crude Oil Consumption Over Time'
+    )
+
+    fig_bar_prod = horizontal_bar_chart(
+        yearly_production,
+        'Million Barrels/Day',
+        title='Bar Chart of Crude Oil Production',
+        x_axis='Crude Oil Production Million Barrels/Day',
+        y_axis='Region'
+    )
+
+    fig_bar_cons = horizontal_bar_chart(
+        yearly_consumption,
+        'Million Barrels/Day',
+        title='Bar Chart of Crude Oil Consumption',
+        x_axis='Crude Oil Production Million Barrels/Day',
+        y_axis='Region'
+    )
+
+    fig_stacked_area_prod = go.Figure()
+    fig_stacked_area_prod = stacked_area_graph(
+        fig_stacked_area_prod,
+        yearly_production,
+        label='Average Crude Oil Production Million Barrel/Day',
+    )
+    fig_stacked_area_prod = stacked_area_graph(
+        fig_stacked_area_prod,
+        yearly_consumption,
+        label='Average Crude Oil Consumption Million Barrel/Day',
+    )
+    fig_stacked_area_prod = stacked_area_graph(
+        fig_stacked_area_prod,
+        yearly_emission,
+        y='CO2 Emission from Petroleum Products',
+        title='Yearly Oil Production, Consumption Compared to CO2 Emission from Petroleum Products',
+        label='Average CO2 Emission Million Metric Tonnes/Day',
+    )
+
+    fig_cd_consumption = cd_chart(
+        yearly_consumption,
+        yearly_emission,
+        'Consumption',
+        title='Global Oil Consumption & CO₂ Emissions Over Time',
+        x_axis='Oil Consumption Million Barrels/Day',
+        y_axis='CO₂ Emissions Million Tons/Day'
+    )
+
+    fig_cd_production = cd_chart(
+        yearly_production,
+        yearly_emission,
+        'Production',
+        title='Global Oil Production & CO₂ Emissions Over Time',
+        x_axis='Oil Production Million Barrels/Day',
+        y_axis='CO₂ Emissions Million Tons/Day'
+    )
+
+    chart_layout = [
+        dcc.Interval(),
+        html.Div(
+            children=[
+                html.Div(dcc.Markdown('''
+                            # Note
+                            Countries are categorized into categories such as OPEC, OCED, Non-OCED due to
+                            limitations in data.
+                            ''')),
+                html.Div(children=[
+                    dcc.Graph(figure=fig_production, className='full_card'),
+                    dcc.Graph(figure=fig_consumption, className='full_card')]
+                ),
+                html.Div(children=[
+                    dcc.Graph(figure=fig_bar_prod, className='full_card'),
+                    dcc.Graph(figure=fig_bar_cons, className='full_card')]
+                ),
+                html.Div(dcc.Graph(figure=fig_stacked_area_prod, className='full_card')),
+                # html.Div(dcc.Graph(figure=fig_cd_production, className='full_card')),
+                # html.Div(dcc.Graph(figure=fig_cd_consumption, className='full_card'))
+            ]
+        )
+
+    ]
+
+    return chart_layout
@@ -0,0 +1,94 @@
+"""
+Cache for the page layouts built by the update_chart callback
+
+The charts only depend on the data and the selected months, so each page is built once per data snapshot and month range
+and the serialized result is returned on every page switch until a new snapshot is swapped in. Only the most recently
+used pages are kept, since every month range selected in the pickers adds a page.
+"""
+import threading
+from collections import OrderedDict
+import config
+from layout_functions.figure_payload import serialize
+
+
+class FigureCache:
+
+    def __init__(self, builder, holder, max_size=config.figure_cache_size):
+        """
+        :param builder: Function that takes in the page value, a DataSnapshot, the first and last month and returns the
+        callback output
+        :param holder: SnapshotHolder with the data served by the dashboard
+        :param max_size: Number of pages kept
+        """
+
+        self.builder = builder
+        self.holder = holder
+        self.max_size = max_size
+        self.version = None
+        self.cache = OrderedDict()
+        self.building = {}
+        self.lock = threading.Lock()
+
+    def get(self, page, start=None, end=None, snapshot=None):
+        """
+        Returns the serialized output for the page, building it if it is not in the cache yet
+        :param page: Value of the page drop down menu
+        :param start: First month shown as YYYY-mm, None for the first month of the data
+        :param end: Last month shown as YYYY-mm, None for the last month of the data
+        :param snapshot: DataSnapshot to build from, defaults to the one currently served
+        :return: Callback output with the figures already converted to plain json types
+        """
+
+        snapshot = snapshot or self.holder.current()
+        key = (page, start, end, snapshot.version)
+
+        with self.lock:
+            # A request still running on a snapshot that was swapped out gets its page without caching it, so it does
+            # not drop the pages already built for the new snapshot
+            stale = snapshot.version not in (self.version, self.holder.current().version)
+
+            # Pages of older snapshots are dropped as soon as a new snapshot is served
+            if not stale and snapshot.version != self.version:
+                self.cache = OrderedDict()
+                self.building = {}
+                self.version = snapshot.version
+
+            output = self.cache.get(key)
+            if output is not None:
+                self.cache.move_to_end(key)
+            build_lock = None if stale else self.building.setdefault(key, threading.Lock())
+
+        if stale:
+            return serialize(self.builder(page, snapshot, start, end))
+
+        if output is None:
+            # Only one thread builds a page, the others wait for it instead of building the same page again
+            with build_lock:
+                output = self.cache.get(key)
+
+                if output is None:
+                    # Serializing and compacting once here so Dash does not have to walk the plotly figures on every
+                    # request
+                    output = serialize(self.builder(page, snapshot, start, end))
+
+                    with self.lock:
+                        if snapshot.version == self.version:
+                            self.cache[key] = output
+                            self.building.pop(key, None)
+
+                            while len(self.cache) > self.max_size:
+                                self.cache.popitem(last=False)
+
+        return output
+
+    def warm(self, pages, snapshot=None):
+        """
+        Builds every page ahead of time, used at startup and after a new snapshot is swapped in
+        :param pages: List of page values
+        :param snapshot: DataSnapshot to build from, defaults to the one currently served
+        """
+
+        snapshot = snapshot or self.holder.current()
+
+        for page in pages:
+            self.get(page, snapshot=snapshot)
@@ -0,0 +1,231 @@
+"""
+Trims the serialized figures before they are sent to the browser
+
+Works on the callback output after it went through to_json_plotly, so every chart builder benefits without changes
+- Numbers are rounded to config.figure_decimals, plotly writes the numbers nested in lists like customdata in full
+  precision
+- Numeric lists are encoded as base64 typed arrays like plotly already does for numpy arrays, plotly.js reads them
+  from version 2.28, which dash bundles from 2.15 on
+- Line traces longer than config.figure_max_points are downsampled with Largest Triangle Three Buckets, which keeps the
+  points that shape the line
+- Animation frames only keep the trace properties that differ from the figure, plotly.js merges each frame into the
+  traces already drawn, so the country names of the maps are sent once instead of once per year
+"""
+import base64
+import json
+import numpy as np
+from plotly.io.json import to_json_plotly
+import config
+
+
+# Per point properties of a trace that are cut along with x and y when a trace is downsampled
+point_properties = ['text', 'hovertext', 'customdata', 'ids']
+
+# Numeric per point properties that plotly.js reads from typed arrays, other lists like ranges must stay lists
+array_properties = ['x', 'y', 'z', 'size', 'color', 'base', 'width', 'lat', 'lon', 'values']
+
+
+def decode_array(value):
+    """
+    :param value: List or base64 typed array written by plotly
+    :return: Numpy array, None if the value is not an array
+    """
+
+    if isinstance(value, dict) and 'bdata' in value and 'dtype' in value:
+        array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+        return array.reshape(value['shape']) if 'shape' in value else array
+
+    if isinstance(value, list):
+        return np.asarray(value, dtype=object)
+
+    return None
+
+
+def encode_array(array):
+    """
+    :param array: 1D numpy array of floats or ints
+    :return: Base64 typed array in the format read by plotly.js
+    """
+
+    array = np.ascontiguousarray(array)
+
+    return {'dtype': array.dtype.str.lstrip('<|'), 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def is_numeric_list(value):
+    """
+    :param value: Any json value
+    :return: True if the value is a non empty list of numbers
+    """
+
+    return (isinstance(value, list) and len(value) > 0 and
+            all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value))
+
+
+def round_value(value, decimals, key=None):
+    """
+    Rounds every number in a json value
+    :param value: Json value
+    :param decimals: Number of decimals kept
+    :param key: Name of the property holding the value
+    :return: Json value with the numbers rounded and the numeric point arrays encoded as typed arrays
+    """
+
+    if isinstance(value, float):
+        return round(value, decimals)
+
+    if isinstance(value, dict):
+        if 'bdata' in value and value.get('dtype') in ('f4', 'f8'):
+            array = np.round(decode_array(value), decimals)
+            return {**encode_array(array.ravel()), **({'shape': value['shape']} if 'shape' in value else {})}
+
+        return {name: round_value(item, decimals, name) for name, item in value.items()}
+
+    if key in array_properties and is_numeric_list(value) and len(value) > 1:
+        if all(isinstance(item, int) for item in value):
+            return value
+        return encode_array(np.round(np.asarray(value, dtype=float), decimals))
+
+    if isinstance(value, list):
+        return [round_value(item, decimals, key) for item in value]
+
+    return value
+
+
+def lttb(y, threshold):
+    """
+    Largest Triangle Three Buckets on evenly spaced points
+    :param y: 1D numpy array of floats
+    :param threshold: Number of points kept
+    :return: Sorted numpy array with the positions of the points kept, the first and last points are always kept
+    """
+
+    n_points = len(y)
+
+    if threshold >= n_points or threshold < 3:
+        return np.arange(n_points)
+
+    x = np.arange(n_points, dtype=float)
+    edges = np.linspace(1, n_points - 1, threshold - 1).astype(int)
+    kept = [0]
+
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # Average of the next bucket, or the last point for the last bucket
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n_points
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        # Point of the bucket that makes the largest triangle with the last point kept and the next average
+        prev_x, prev_y = x[kept[-1]], y[kept[-1]]
+        area = np.abs((prev_x - next_x) * (y[start:end] - prev_y) - (prev_x - x[start:end]) * (next_y - prev_y))
+        kept.append(start + int(np.nanargmax(area)) if np.isfinite(area).any() else start)
+
+    kept.append(n_points - 1)
+
+    return np.asarray(kept)
+
+
+def downsample_trace(trace, max_points):
+    """
+    :param trace: Serialized plotly trace
+    :param max_points: Number of points kept for a line trace
+    :return: Trace with at most max_points points if it is a line trace, otherwise the same trace
+    """
+
+    if trace.get('type', 'scatter') not in ('scatter', 'scattergl') or 'lines' not in trace.get('mode', 'lines'):
+        return trace
+
+    y = decode_array(trace.get('y'))
+
+    if y is None or y.ndim != 1 or len(y) <= max_points:
+        return trace
+
+    kept = lttb(y.astype(float), max_points)
+    trace = dict(trace)
+
+    for key in ['x', 'y'] + point_properties:
+        values = decode_array(trace.get(key))
+        if values is not None and len(values) == len(y):
+            values = values[kept]
+            trace[key] = encode_array(values) if values.dtype.kind in 'fiu' else values.tolist()
+
+    return trace
+
+
+def drop_unchanged_frames(figure):
+    """
+    :param figure: Serialized plotly figure
+    :return: Figure without the frame trace properties that are the same as the figure trace in every frame
+    """
+
+    if not figure.get('frames'):
+        return figure
+
+    traces = figure.get('data', [])
+
+    def frame_traces(frame):
+        return zip(frame.get('traces', range(len(frame.get('data', [])))), frame.get('data', []))
+
+    # A property is only dropped if no frame changes it, otherwise going back to a frame would not restore it
+    changed = set()
+    for frame in figure['frames']:
+        for target, trace in frame_traces(frame):
+            for key, value in trace.items():
+                if target >= len(traces) or traces[target].get(key) != value:
+                    changed.add((target, key))
+
+    frames = [
+        {**frame, 'data': [{key: value for key, value in trace.items() if key == 'type' or (target, key) in changed}
+                           for target, trace in frame_traces(frame)]}
+        for frame in figure['frames']
+    ]
+
+    return {**figure, 'frames': frames}
+
+
+def compact_figure(figure, decimals=config.figure_decimals, max_points=config.figure_max_points):
+    """
+    :param figure: Serialized plotly figure
+    :param decimals: Number of decimals kept
+    :param max_points: Number of points kept for each line trace, None to keep every point
+    :return: Smaller serialized figure
+    """
+
+    figure = drop_unchanged_frames(dict(figure))
+
+    if max_points:
+        figure['data'] = [downsample_trace(trace, max_points) for trace in figure.get('data', [])]
+
+    for key in ['data', 'frames']:
+        if key in figure:
+            figure[key] = round_value(figure[key], decimals)
+
+    return figure
+
+
+def compact_output(output):
+    """
+    Compacts every figure in a serialized callback output
+    :param output: Callback output converted to plain json types
+    :return: Callback output with the figures compacted
+    """
+
+    if isinstance(output, dict):
+        return {key: compact_figure(value) if key == 'figure' and isinstance(value, dict) else compact_output(value)
+                for key, value in output.items()}
+
+    if isinstance(output, list):
+        return [compact_output(item) for item in output]
+
+    return output
+
+
+def serialize(output):
+    """
+    :param output: Callback output with dash components and plotly figures
+    :return: Callback output converted to plain json types with the figures compacted
+    """
+
+    return compact_output(json.loads(to_json_plotly(output)))
@@ -0,0 +1,198 @@
+# Charts of the Forecasting page
+# statsmodels is only imported when a decomposition or correlation is missing from the snapshot, so a worker serving
+# the stored results never loads it
+from dash import html
+from dash import dcc
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from data_processing.correlation import correlation_rows, series_correlations
+from data_processing.decomposition import stl
+from data_processing.snapshot import month_slice
+from layout_functions.layout_functions import line_graph, month_labels
+
+
+# Series on the Forecasting page
+forecasting_options = [
+    {'label': 'Consumer Price Index', 'value': 'Cpi Values'},
+    {'label': 'Producer Price Index', 'value': 'PPI Values'},
+    {'label': 'Unemployment Rate', 'value': 'Unemployment'},
+    {'label': 'Unleaded Gasoline', 'value': 'Unleaded Gasoline'},
+    {'label': 'UK Brent Prices', 'value': 'UK Brent Prices'},
+    {'label': 'WTI Prices', 'value': 'WTI Prices'}
+]
+
+
+def forecasting_window(data):
+
+    # Last five years of the BLS data
+    end = data.bls_data.index[-1]
+
+    return end - 12 * 5, end
+
+
+def forecasting_page(data, start=None, end=None):
+
+    # The series is picked on the page, its charts are built by forecasting_graph
+    chart_layout = [
+        html.Label("Select Series Forecast Here"),
+        html.Div(
+            dcc.Dropdown(
+                id='forecasting_dropdown',
+                options=forecasting_options,
+                value='Cpi Values',  # Default selection
+                clearable=False
+            ),
+            className='drop_down_menu_2'
+        ),
+        html.Div(dcc.Interval()),
+        html.Div(dcc.Markdown(
+            """
+            """
+        )),
+        html.Div(id='forecasting_graph container'),  # Line chart
+    ]
+
+    return chart_layout
+
+
+def forecasting_graph(data, value):
+
+    merged_df = data.merged_df
+    forecast_data = data.forecast_data
+
+    start, end = forecasting_window(data)
+    filtered_merged_data = month_slice(merged_df, start, end)
+
+    # The forecasts start after the last month of the data, so only the start of the window applies to them
+    filtered_forecast_data = month_slice(forecast_data, start)
+    stl_data = filtered_merged_data
+
+    forecasting_column = [col for col in filtered_forecast_data.columns if value in col]
+    forecasting_data = filtered_forecast_data[['year_month'] + forecasting_column]
+
+    fig_forecast_line = go.Figure()
+    line_graph(fig_forecast_line, filtered_merged_data, 'year_month', value)
+
+    for column in forecasting_column:
+
+        line_graph(
+            fig_forecast_line,
+            data=forecasting_data,
+            x='year_month',
+            y=column,
+            mode='line',
+            title='Forecasting ' + value,
+            x_axis='year',
+            y_axis='Value'
+        )
+
+    return html.Div(
+        children=[
+            dcc.Graph(figure=fig_forecast_line, className='full_card'),
+            html.Div(dcc.Graph(figure=stl_chart(stl_data, x='year_month', y=value,
+                                                components=data.decompositions.get(stl_data, value)),
+                               className='full_card')),
+            html.Div(dcc.Graph(figure=acf_pacf_plot(merged_df, value, lag=50,
+                                                   correlations=data.correlations.get(value, 50)),
+                               className='full_card')),  # ACF, PACF
+    ])
+
+
+def stl_chart(data, x, y, components=None):
+
+    new_df = stl(data[y]) if components is None else components
+
+    fig_subplot = make_subplots(rows=3, cols=1, shared_xaxes=True,
+                                subplot_titles=["Trend", "Seasonal", "Residual"])
+
+    fig_subplot.add_trace(
+        go.Scatter(
+            x=month_labels(data[x]),
+            y=new_df["trend"],
+            mode="lines",
+            name="Trend"),
+        row=1,
+        col=1)
+    fig_subplot.add_trace(
+        go.Scatter(
+            x=month_labels(data["year_month"]),
+            y=new_df["seasonal"],
+            mode="lines",
+            name="Seasonal"),
+        row=2,
+        col=1)
+    fig_subplot.add_trace(
+        go.Scatter(
+            x=month_labels(data["year_month"]),
+            y=new_df["residuals"],
+            mode="markers",
+            name="Residuals"),
+        row=3,
+        col=1)
+
+    fig_subplot.update_layout(
+        title="STL Decomposition" ,
+        height=700,
+        plot_bgcolor="#252a3b",
+        paper_bgcolor="#1E1E2F",
+        font=dict(color="white"),
+    )
+
+    return fig_subplot
+
+def acf_pacf_plot(data, column, lag, correlations=None):
+
+    if correlations is None:
+        correlations = dict(zip(correlation_rows, series_correlations(data[column], lag)))
+
+    acf_values = correlations['acf']
+    pacf_values = correlations['pacf']
+
+    fig = make_subplots(rows=2, cols=1,
+                        subplot_titles=["Autocorrelation Function (ACF)", "Partial Autocorrelation Function (PACF)"])
+
+    fig.add_trace(
+        go.Bar(
+            x=list(range(lag + 1)),
+            y=acf_values,
+            name='ACF'
+        ),
+        row=1,
+        col=1
+    )
+
+    fig.add_trace(
+        go.Bar(
+            x=list(range(lag + 1)),
+            y=pacf_values,
+            name='ACF'
+        ),
+        row=2,
+        col=1
+    )
+
+    # 95% confidence bands, the correlations outside of them are significant
+    for row, band in [(1, correlations['acf_band']), (2, correlations['pacf_band'])]:
+        for sign in [1, -1]:
+            fig.add_trace(
+                go.Scatter(
+                    x=list(range(lag + 1)),
+                    y=sign * band,
+                    mode='lines',
+                    line=dict(color='grey', dash='dash'),
+                    name='95% Confidence',
+                    showlegend=False
+                ),
+                row=row,
+                col=1
+            )
+
+    fig.update_layout(
+        title=f"ACF & PACF of {column}",
+        height=700,
+        plot_bgcolor="#252a3b",
+        paper_bgcolor="#1E1E2F",
+        font=dict(color="white"),
+    )
+
+    return fig
@@ -0,0 +1,115 @@
+"""
+HTTP caching headers for the dashboard
+
+- Assets are linked with their modified time in the url (?m=...), so a new version of a file gets a new url and the
+  browser can keep the file for a year
+- The layout only depends on the data snapshot and the deployed code, its ETag is built from the snapshot version and
+  a version of the code. A browser revalidating the layout with If-None-Match gets a 304 before the layout is built,
+  and a redeploy that changes the pages or the callbacks sends the new layout even if the data did not change
+- The callback outputs only depend on the snapshot, the code and the request body, so they get an ETag from all three.
+  Callbacks are POST requests, which browsers do not revalidate, the ETag lets a proxy or a client tell that an output
+  did not change
+
+Flask-Compress appends the encoding to strong ETags (":gzip", ":br"), so the suffix is removed before comparing.
+"""
+import hashlib
+import os
+import dash
+from flask import g, request
+
+
+# Seconds an asset with a modified time in its url is cached by the browser
+asset_max_age = 60 * 60 * 24 * 365
+
+# Folders of the app, relative to the root of the repository, and the kinds of files that make up the deployed code
+code_folders = ['.', 'layout_functions', 'data_processing', 'assets']
+code_extensions = ('.py', '.css', '.js')
+
+
+def code_version(root, folders=code_folders):
+    """
+    Builds a version id of the deployed code from the names, sizes and modified times of its files and the Dash version
+    :param root: Path to the root of the repository
+    :param folders: Folders with the code, relative to root
+    :return: Hex string that changes whenever a file of the code or Dash changes
+    """
+
+    fingerprint = hashlib.sha1(f'dash:{dash.__version__};'.encode())
+
+    for folder in folders:
+        for file_name in sorted(os.listdir(os.path.join(root, folder))):
+            if file_name.endswith(code_extensions):
+                file_stat = os.stat(os.path.join(root, folder, file_name))
+                fingerprint.update(f'{folder}/{file_name}:{file_stat.st_size}:{file_stat.st_mtime_ns};'.encode())
+
+    return fingerprint.hexdigest()[:16]
+
+
+def snapshot_etag(version, path, body=b'', code=''):
+    """
+    :param version: Version of the data snapshot
+    :param path: Path of the request
+    :param body: Body of the request
+    :param code: Version of the deployed code
+    :return: Strong ETag value without the quotes
+    """
+
+    return hashlib.sha1(f'{code}:{version}:{path}:'.encode() + body).hexdigest()[:32]
+
+
+def matches(etag, if_none_match):
+    """
+    :param etag: ETag value without the quotes
+    :param if_none_match: ETags sent by the client
+    :return: True if one of the ETags sent is etag, with or without the encoding appended by Flask-Compress
+    """
+
+    return any(tag.split(':')[0] == etag for tag in if_none_match)
+
+
+def enable_http_cache(app, holder):
+    """
+    Adds the caching headers to the responses of a Dash app
+    :param app: Dash app
+    :param holder: SnapshotHolder with the data served by the app
+    """
+
+    server = app.server
+    prefix = app.config.routes_pathname_prefix
+    layout_path = prefix + '_dash-layout'
+    callback_path = prefix + '_dash-update-component'
+    assets_path = prefix + app.config.assets_url_path.strip('/') + '/'
+
+    # Taken once when the app starts, a redeploy starts new processes
+    code = code_version(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    @server.before_request
+    def check_snapshot_etag():
+
+        if request.path == layout_path and request.method == 'GET':
+            g.snapshot_etag = snapshot_etag(holder.current().version, request.path, code=code)
+
+            if matches(g.snapshot_etag, request.if_none_match):
+                response = server.response_class(status=304)
+                response.set_etag(g.snapshot_etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+
+        elif request.path == callback_path and request.method == 'POST':
+            # Read before the callback runs, a snapshot swapped in meanwhile only makes the ETag older than the output
+            g.snapshot_etag = snapshot_etag(holder.current().version, request.path, request.get_data(), code)
+
+    @server.after_request
+    def add_cache_headers(response):
+
+        etag = g.pop('snapshot_etag', None)
+
+        if etag is not None and response.status_code == 200:
+            response.set_etag(etag)
+            # Cached by the browser but checked against the server on every use, since a new snapshot changes it
+            response.headers['Cache-Control'] = 'no-cache'
+
+        elif request.path.startswith(assets_path) and 'm' in request.args and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = f'public, max-age={asset_max_age}, immutable'
+
+        return response
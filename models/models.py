@@ -7,302 +7,425 @@
 #   - Forecast CPI using different price point of the crude oil
 # Maybe detrend data
 
-# import pandas as pd
-# import numpy as np
-# from statsmodels.tsa.statespace.sarimax import SARIMAX
-# from statsmodels.tsa.stattools import adfuller
-# from sklearn.metrics import mean_squared_error, root_mean_squared_error, r2_score
-# from sklearn.linear_model import LinearRegression
-# from xgboost import XGBRegressor
-#
-# from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
-#
-#
-#
-#
-# class Model:
-#
-#     def __init__(self, df, y, order, seasonal_order):
-#
-#         self.data = df
-#         self.data['year_month'] = pd.to_datetime(self.data['year_month']).dt.strftime('%Y-%m')
-#         self.data = self.data.sort_values(by='year_month', ascending=True, inplace=False)
-#         self.target = y
-#         self.y = self.data.loc[:, [self.target, 'year_month']]
-#         self.order = order
-#         self.s_order = seasonal_order
-#
-#     def check_stationarity(self, new_df):
-#
-#         threshold = 0.05
-#         p_value = 1
-#         max_diff = 3
-#         current_diff = 0
-#
-#         while p_value > threshold and current_diff < max_diff:
-#
-#             for column in new_df.columns[1:-1]:
-#                 stationary = adfuller(new_df[column].dropna())
-#                 print('Column:' + column)
-#                 print('-----------------------------------------')
-#                 print(f"ADF Statistic: {stationary[0]:.2f}")
-#                 print(f"p-value: {stationary[1]:.2f}")
-#                 print("Series is NOT stationary\n") if stationary[1] > 0.05 else print("Series is stationary\n")
-#                 p_value = stationary[1]
-#
-#                 if p_value > threshold:
-#                     current_diff += 1
-#                     print(f"Number of Difference: {current_diff:.2f}\n")
-#                     new_df.iloc[:, 1:-1] = new_df.iloc[:, 1:-1].diff()
-#                     new_df = new_df.dropna()
-#
-#         new_df.iloc[:, 1:-1] = abs(new_df.iloc[:, 1:-1])
-#
-#         return new_df
-#
-#     def min_max_transform(self, df, reverse=False):
-#
-#         if not reverse:
-#             for col in df.columns:
-#                 df[col] = ((df[col] - df[col].min()) / (df[col].max() - df[col].min()))
-#         else:
-#             for col in df.columns:
-#                 df[col] = (df[col].max() - df[col].min()) / (df[col] - df[col].min())
-#
-#         return df
-#
-#     def train_test_split(self, target_col, test_prop):
-#
-#         train_size = int(len(self.y) * (1 - test_prop))
-#
-#         # Use iloc for position-based slicing
-#         x_train = self.y.iloc[:train_size, self.y.columns != target_col]
-#         x_test = self.y.iloc[train_size:, self.y.columns != target_col]
-#         y_train = self.y.iloc[:train_size][target_col]
-#         y_test = self.y.iloc[train_size:][target_col]
-#
-#         return x_train, x_test, y_train, y_test
-#
-#     def metric(self, y_true, y_pred):
-#
-#         mse = mean_squared_error(y_true=y_true, y_pred=y_pred)
-#         rmse = root_mean_squared_error(y_true=y_true, y_pred=y_pred)
-#
-#         return {'mse': mse, 'rmse': rmse}
-#
-#     def lag_features(self, new_df, lag, remove_original=None):
-#
-#         for col in new_df.columns:
-#             for num in lag:
-#                 try:
-#                     new_df[col + '_' + str(num)] = new_df[col].shift(num)
-#                 except AttributeError as e:
-#                     new_df[col + '_' + str(num)] = new_df.shift(num)
-#                     print(e)
-#             if remove_original:
-#                 new_df = new_df.drop(col, axis=1)
-#
-#         return new_df.dropna()
-#
-#     def seasonal_naives(self, steps):
-#
-#         new_df = self.y.iloc[-steps:][self.target].copy()
-#         future_dates = pd.date_range(start=new_df.index[-1][:4] + '-2',
-#                                      periods=steps, freq='MS').strftime('%Y-%m')
-#         new_df = pd.DataFrame({self.target: new_df.values}, index=future_dates)
-#
-#         return new_df
-#
-#     def linear_regression(self, x_train, y_train):
-#
-#         lr = LinearRegression()
-#         lr.fit(x_train, y_train)
-#
-#         return lr
-#
-#     def sarimax(self, y_train, p, d, q, s, trend=None, exog=None):  # Use p=1, d=1, q=1
-#
-#         sarima = SARIMAX(
-#             endog=y_train,
-#             order=(p, d, q),
-#             trend=trend,
-#             seasonal_order=s,
-#             exog=exog,
-#             enforce_stationarity=False,
-#             enforce_invertibility=False
-#         )
-#
-#         results = sarima.fit(disp=False)
-#
-#         return results
-#
-#     def xgboost(self, x_train, y_train, x_test=None, y_test=None):
-#
-#         param_grid = {
-#             'learning_rate': [0.1, 0.3, 0.5, 0.75],
-#             'max_depth': [3, 5, 7],
-#             'lambda': [10, 30, 50, 100, 1000],
-#             'alpha': [1, 3, 5, 10],
-#             'gamma': [0, 0.1, 0.3, 0.5, 0.7]
-#         }
-#
-#         grid_serach = GridSearchCV(
-#             estimator=XGBRegressor(objective="reg:squarederror"),
-#             param_grid=param_grid,
-#             scoring='neg_mean_squared_error',
-#             cv=TimeSeriesSplit(n_splits=2)
-#         )
-#
-#         best_param = grid_serach.fit(x_train, y_train).best_params_
-#         print(best_param)
-#
-#         param = {
-#             'objective': "reg:squarederror",
-#             'eval_metric': 'rmse',
-#             'n_estimators': 150,
-#             'learning_rate': best_param['learning_rate'],
-#             'max_depth': best_param['max_depth'],
-#             'lambda': best_param['lambda'],
-#             'alpha': best_param['alpha']
-#         }
-#
-#         if x_test is not None and y_test is not None:
-#             xgb_model = XGBRegressor(**param, early_stopping_rounds=3)
-#             xgb_model.fit(x_train, y_train, eval_set=[(x_train, y_train), (x_test, y_test)], verbose=149)
-#         else:
-#             xgb_model = XGBRegressor(**param, early_stopping_rounds=3)
-#             xgb_model.fit(x_train, y_train, eval_set=[(x_train, y_train)], verbose=149)
-#
-#         return xgb_model
-#
-#     def iterative_forecast(self, ts_model, df_history, horizon):
-#
-#         last_row = df_history.iloc[-1].copy()
-#         forecast_list = []
-#         feat = {}
-#
-#         for column in df_history.columns:
-#             feat[column] = last_row[column]
-#
-#         x_future = pd.DataFrame([feat])
-#
-#         for i in range(horizon):
-#
-#             pred = ts_model.predict(x_future)[0]
-#
-#             forecast_list.append({
-#                 x_future.columns[0] + "_forecast": pred
-#             })
-#
-#             n_cols = x_future.shape[1]
-#
-#             for j in range(n_cols - 1, 0, -1):
-#                 x_future.iloc[0, j] = x_future.iloc[0, j - 1]
-#
-#             x_future.iloc[0, 0] = pred
-#
-#         df_forecast = pd.DataFrame(forecast_list)
-#
-#         return df_forecast
-#
-#     def year_month_index(self, df):
-#
-#         df['year_month'] = pd.date_range(
-#             df['year_month'].min(),
-#             df['year_month'].max(),
-#             freq='MS').strftime('%Y-%m')
-#         df.reset_index()
-#         df.set_index('year_month', inplace=True)
-#
-#         return df
-#
-#     def model_building(self):
-#
-#         s_t = stl(self.y.copy()[self.target])
-#         lag = list(range(1, 13))
-#         self.y.iloc[:, 0] = self.y.iloc[:, 0] - s_t['seasonal'] - s_t['residuals']
-#         self.y['year_month'] = self.data['year_month'].copy()
-#         self.y = self.lag_features(self.y.iloc[:, :-1], lag, False)
-#         self.y['year_month'] = self.data['year_month'].copy()
-#         self.y = self.year_month_index(self.y)
-#         x_train, x_test, y_train, y_test = self.train_test_split(self.target, test_prop=0.1)
-#
-#         # Linear Regression Model
-#         lr_model = self.linear_regression(x_train, y_train)
-#         lr_pred = lr_model.predict(x_test)
-#         lr_trend = lr_pred[-12:]
-#         lr_metrics = self.metric(y_test, lr_pred)
-#         lr_metrics['r2'] = r2_score(y_true=y_test, y_pred=lr_pred)
-#         lr_forecast = pd.DataFrame(self.iterative_forecast(
-#             lr_model, x_test, 12).reset_index().iloc[-12:, 1].values +
-#                                    s_t['residuals'].reset_index().iloc[-12:, 1].values +
-#                                    s_t['seasonal'].reset_index().iloc[-12:, 1].values)
-#
-#         # XGBoost
-#         self.y = pd.DataFrame(s_t['residuals'])
-#         self.y = self.lag_features(self.y, lag, False)
-#         x_train, x_test, y_train, y_test = self.train_test_split('residuals', test_prop=0.1)
-#         xgb_model = self.xgboost(x_train, y_train, x_test, y_test)
-#         xgb_metrics = self.metric(y_test, xgb_model.predict(x_test))
-#         print(xgb_metrics)
-#         xgb_forecast = self.iterative_forecast(xgb_model, x_test, 12)
-#         xgb_forecast = (pd.DataFrame(xgb_forecast.reset_index()).iloc[:, 1].values +
-#                         lr_trend +
-#                         s_t['seasonal'].reset_index().iloc[-12:, 1].values)
-#         xgb_forecast = pd.DataFrame(xgb_forecast)
-#
-#         # Seasonal Naives
-#         self.y = self.data.copy()
-#         self.y = self.year_month_index(self.y)
-#         s_naives = self.seasonal_naives(max(lag))
-#
-#         # SARIMA
-#         self.y = self.data.copy()
-#         self.y = self.year_month_index(self.y)
-#         x_train, x_test, y_train, y_test = self.train_test_split(self.target, test_prop=0.1)
-#
-#         # Final SARIMA model
-#         sarima = self.sarimax(pd.concat([y_train, y_test], axis=0),
-#                               self.order[0], self.order[1], self.order[2], self.s_order, trend='ct')
-#         sarima_forecast = sarima.forecast(steps=12)
-#
-#
-#         # XGBoost + SARIMA
-#         self.y = self.data.copy()
-#         self.y = self.year_month_index(self.y)
-#         self.y = pd.concat([sarima.resid, self.y.copy()[self.target], sarima.fittedvalues], axis=1)
-#         self.y.columns = ['arima_resid', self.target, 'arima_fitted_values']
-#         self.y = self.lag_features(self.y, lag, False)
-#         self.y = self.y.drop(columns=[self.target, 'arima_fitted_values'], axis=1)
-#         x_train, x_test, y_train, y_test = self.train_test_split('arima_resid', test_prop=0.1)
-#         xgb_sarima = self.xgboost(x_train, y_train, x_test, y_test)
-#         resid_forecast = self.iterative_forecast(xgb_sarima, x_test, 12)
-#         final_xgb_arima = (sarima.get_forecast(steps=12).predicted_mean.reset_index().iloc[:, 1] +
-#                            resid_forecast.reset_index().iloc[:, 1])
-#
-#
-#         final_df = pd.DataFrame()
-#         final_df['year_month'] = pd.date_range(start=self.y.index[-1][:4] + '-2',
-#                                                periods=max(lag), freq='MS').strftime('%Y-%m')
-#         final_df = pd.concat([
-#             final_df,
-#             lr_forecast.reset_index().iloc[:, 1],
-#             s_naives.reset_index().iloc[:, 1],
-#             xgb_forecast.reset_index().iloc[:, 1],
-#             sarima_forecast.reset_index().iloc[:, 1],
-#             final_xgb_arima.reset_index().iloc[:, 1],
-#         ], axis=1)
-#         final_df.columns = [
-#             'year_month',
-#             self.target + ' Linear Regression Forecast',
-#             self.target + ' Seasonal Naives Forecast',
-#             self.target + ' XGBoost Forecast',
-#             self.target + ' SARIMA Forecast',
-#             self.target + ' SARIMA' + ' & XGBoost Forecast'
-#         ]
-#
-#         return final_df
-#
+import os
+import time
+import warnings
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from statsmodels.tsa.stattools import adfuller
+from sklearn.metrics import mean_squared_error, root_mean_squared_error, r2_score
+from sklearn.linear_model import LinearRegression
+from xgboost import XGBRegressor
+
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401, needed to import HalvingGridSearchCV
+from sklearn.model_selection import TimeSeriesSplit, GridSearchCV, HalvingGridSearchCV, ParameterGrid, ParameterSampler
+from data_processing.decomposition import stl
+from models.registry import build_forecast
+
+
+# Hyperparameters searched for the XGBoost models
+xgb_param_grid = {
+    'learning_rate': [0.1, 0.3, 0.5, 0.75],
+    'max_depth': [3, 5, 7],
+    'lambda': [10, 30, 50, 100, 1000],
+    'alpha': [1, 3, 5, 10],
+    'gamma': [0, 0.1, 0.3, 0.5, 0.7]
+}
+
+
+class Model:
+
+    # Lags used as features by the regression models
+    lag = list(range(1, 13))
+
+    def __init__(self, df, y, order, seasonal_order, n_jobs=None, search='halving', n_candidates=60,
+                 random_state=0):
+
+        self.data = df
+        self.data['year_month'] = pd.to_datetime(self.data['year_month']).dt.strftime('%Y-%m')
+        self.data = self.data.sort_values(by='year_month', ascending=True, inplace=False)
+        self.target = y
+        self.y = self.data.loc[:, [self.target, 'year_month']]
+        self.order = order
+        self.s_order = seasonal_order
+        self.n_jobs = n_jobs
+        self.search = search
+        self.n_candidates = n_candidates
+        self.random_state = random_state
+        self.search_fits = 0
+        self.fitted = {}
+        self.stl_components = None
+
+        # Best XGBoost hyperparameters found by the searches of earlier runs, set from the registry, and by the searches
+        # of this model, both used to warm start the next searches
+        self.warm_params = []
+        self.best_params = []
+
+    def check_stationarity(self, new_df):
+
+        threshold = 0.05
+        p_value = 1
+        max_diff = 3
+        current_diff = 0
+
+        while p_value > threshold and current_diff < max_diff:
+
+            for column in new_df.columns[1:-1]:
+                stationary = adfuller(new_df[column].dropna())
+                print('Column:' + column)
+                print('-----------------------------------------')
+                print(f"ADF Statistic: {stationary[0]:.2f}")
+                print(f"p-value: {stationary[1]:.2f}")
+                print("Series is NOT stationary\n") if stationary[1] > 0.05 else print("Series is stationary\n")
+                p_value = stationary[1]
+
+                if p_value > threshold:
+                    current_diff += 1
+                    print(f"Number of Difference: {current_diff:.2f}\n")
+                    new_df.iloc[:, 1:-1] = new_df.iloc[:, 1:-1].diff()
+                    new_df = new_df.dropna()
+
+        new_df.iloc[:, 1:-1] = abs(new_df.iloc[:, 1:-1])
+
+        return new_df
+
+    def min_max_transform(self, df, reverse=False):
+
+        if not reverse:
+            for col in df.columns:
+                df[col] = ((df[col] - df[col].min()) / (df[col].max() - df[col].min()))
+        else:
+            for col in df.columns:
+                df[col] = (df[col].max() - df[col].min()) / (df[col] - df[col].min())
+
+        return df
+
+    def train_test_split(self, target_col, test_prop):
+
+        train_size = int(len(self.y) * (1 - test_prop))
+
+        # Use iloc for position-based slicing
+        x_train = self.y.iloc[:train_size, self.y.columns != target_col]
+        x_test = self.y.iloc[train_size:, self.y.columns != target_col]
+        y_train = self.y.iloc[:train_size][target_col]
+        y_test = self.y.iloc[train_size:][target_col]
+
+        return x_train, x_test, y_train, y_test
+
+    def metric(self, y_true, y_pred):
+
+        mse = mean_squared_error(y_true=y_true, y_pred=y_pred)
+        rmse = root_mean_squared_error(y_true=y_true, y_pred=y_pred)
+
+        return {'mse': mse, 'rmse': rmse}
+
+    def lag_features(self, new_df, lag, remove_original=None):
+
+        for col in new_df.columns:
+            for num in lag:
+                try:
+                    new_df[col + '_' + str(num)] = new_df[col].shift(num)
+                except AttributeError as e:
+                    new_df[col + '_' + str(num)] = new_df.shift(num)
+                    print(e)
+            if remove_original:
+                new_df = new_df.drop(col, axis=1)
+
+        return new_df.dropna()
+
+    def seasonal_naives(self, steps):
+
+        new_df = self.y.iloc[-steps:][self.target].copy()
+        future_dates = pd.date_range(start=new_df.index[-1][:4] + '-2',
+                                     periods=steps, freq='MS').strftime('%Y-%m')
+        new_df = pd.DataFrame({self.target: new_df.values}, index=future_dates)
+
+        return new_df
+
+    def linear_regression(self, x_train, y_train):
+
+        lr = LinearRegression()
+        lr.fit(x_train, y_train)
+
+        return lr
+
+    def sarimax(self, y_train, p, d, q, s, trend=None, exog=None, params=None):  # Use p=1, d=1, q=1
+
+        sarima = SARIMAX(
+            endog=y_train,
+            order=(p, d, q),
+            trend=trend,
+            seasonal_order=s,
+            exog=exog,
+            enforce_stationarity=False,
+            enforce_invertibility=False
+        )
+
+        if params is not None:
+            # Parameters of an earlier fit, the series is only filtered again so the new months update the state
+            return sarima.smooth(params)
+
+        results = sarima.fit(disp=False)
+
+        return results
+
+    def search_candidates(self, n_candidates):
+        """
+        Picks the hyperparameters tried by the random and halving searches, the best hyperparameters found by the
+        earlier searches come first followed by a random sample of the grid
+        :param n_candidates: Number of hyperparameter combinations
+        :return: List of dict, one per combination with each value in a list
+        """
+
+        candidates = []
+        for params in (self.warm_params + self.best_params)[::-1]:
+            if len(candidates) >= n_candidates:
+                break
+            if params not in candidates:
+                candidates.append(dict(params))
+
+        for params in ParameterSampler(xgb_param_grid, n_iter=len(ParameterGrid(xgb_param_grid)),
+                                       random_state=self.random_state):
+            if len(candidates) >= n_candidates:
+                break
+            if params not in candidates:
+                candidates.append(params)
+
+        return [{key: [value] for key, value in params.items()} for params in candidates]
+
+    def search_params(self, x_train, y_train):
+        """
+        Searches the XGBoost hyperparameters with the strategy in self.search
+        - grid: every combination of the grid
+        - random: a sample of the grid, warm started with the best hyperparameters found so far
+        - halving: the same candidates with successive halving, the candidates are first compared with few trees and
+          only the best third moves on to three times as many trees
+        :param x_train: Training features
+        :param y_train: Training target
+        :return: Dict with the best hyperparameters
+        """
+
+        # The fits run in parallel, so each model gets a single thread
+        estimator = XGBRegressor(objective="reg:squarederror", n_jobs=1)
+        settings = {'scoring': 'neg_mean_squared_error', 'cv': TimeSeriesSplit(n_splits=2), 'n_jobs': self.n_jobs}
+
+        if self.search == 'grid':
+            search = GridSearchCV(estimator=estimator, param_grid=xgb_param_grid, **settings)
+
+        elif self.search == 'random':
+            search = GridSearchCV(estimator=estimator, param_grid=self.search_candidates(self.n_candidates),
+                                  **settings)
+
+        elif self.search == 'halving':
+            search = HalvingGridSearchCV(
+                estimator=estimator,
+                param_grid=self.search_candidates(self.n_candidates),
+                resource='n_estimators',
+                min_resources=15,
+                max_resources=150,
+                factor=3,
+                random_state=self.random_state,
+                **settings
+            )
+
+        else:
+            raise ValueError(f'Unknown search strategy: {self.search}')
+
+        search.fit(x_train, y_train)
+        self.search_fits += len(search.cv_results_['params']) * settings['cv'].n_splits + 1
+
+        # n_estimators is the resource of the halving search, the final model sets its own number of trees
+        best_param = {key: value for key, value in search.best_params_.items() if key != 'n_estimators'}
+
+        if best_param not in self.best_params:
+            self.best_params.append(best_param)
+
+        return best_param
+
+    def xgboost(self, x_train, y_train, x_test=None, y_test=None):
+
+        best_param = self.search_params(x_train, y_train)
+        print(best_param)
+
+        param = {
+            'objective': "reg:squarederror",
+            'eval_metric': 'rmse',
+            'n_jobs': self.n_jobs,
+            'n_estimators': 150,
+            'learning_rate': best_param['learning_rate'],
+            'max_depth': best_param['max_depth'],
+            'lambda': best_param['lambda'],
+            'alpha': best_param['alpha']
+        }
+
+        if x_test is not None and y_test is not None:
+            xgb_model = XGBRegressor(**param, early_stopping_rounds=3)
+            xgb_model.fit(x_train, y_train, eval_set=[(x_train, y_train), (x_test, y_test)], verbose=149)
+        else:
+            xgb_model = XGBRegressor(**param, early_stopping_rounds=3)
+            xgb_model.fit(x_train, y_train, eval_set=[(x_train, y_train)], verbose=149)
+
+        return xgb_model
+
+    def batch_forecast(self, ts_model, x_last, horizon):
+        """
+        Recursive forecast of many series at once with the same model
+        :param ts_model: Fitted model with a predict method
+        :param x_last: 2D array with the latest lag features of each series, one row per series, newest lag first
+        :param horizon: Number of steps to forecast
+        :return: 2D array with one row of forecasts per series
+        """
+
+        x_last = np.asarray(x_last, dtype=float)
+        n_series, n_lags = x_last.shape
+
+        # The forecasts are written in front of the known lags, so the lag features of every step are a window that
+        # slides one position to the left instead of values shifted one by one
+        buffer = np.empty((n_series, horizon + n_lags))
+        buffer[:, horizon:] = x_last
+
+        with warnings.catch_warnings():
+            # The models are fitted on dataframes, predicting on the array gives the same values without the overhead
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+            for step in range(horizon):
+                start = horizon - step
+                buffer[:, start - 1] = ts_model.predict(buffer[:, start:start + n_lags])
+
+        return buffer[:, :horizon][:, ::-1]
+
+    def iterative_forecast(self, ts_model, df_history, horizon):
+
+        forecast = self.batch_forecast(ts_model, df_history.iloc[[-1]].to_numpy(), horizon)
+        df_forecast = pd.DataFrame({df_history.columns[0] + "_forecast": forecast[0]})
+
+        return df_forecast
+
+    def year_month_index(self, df):
+
+        df['year_month'] = pd.date_range(
+            df['year_month'].min(),
+            df['year_month'].max(),
+            freq='MS').strftime('%Y-%m')
+        df.reset_index()
+        df.set_index('year_month', inplace=True)
+
+        return df
+
+    def reuse_or_fit(self, name, fit, *args):
+        """
+        Returns the model stored under the name in self.fitted, fitting and storing it first if there is none
+        :param name: Name of the model in self.fitted
+        :param fit: Method that fits the model
+        :param args: Arguments of the method
+        :return: Fitted model
+        """
+
+        if name not in self.fitted:
+            self.fitted[name] = fit(*args)
+
+        return self.fitted[name]
+
+    def model_building(self, fitted=None):
+        """
+        Builds the 12 month forecasts of every model
+        :param fitted: Dict with the models of an earlier run, they forecast from the latest data instead of being
+        fitted again. Defaults to fitting every model.
+        :return: Dataframe with the forecasts of each model
+        """
+
+        self.fitted = dict(fitted or {})
+        s_t = stl(self.y.copy()[self.target])
+        self.stl_components = s_t
+        lag = self.lag
+        self.y.iloc[:, 0] = self.y.iloc[:, 0] - s_t['seasonal'] - s_t['residuals']
+        self.y['year_month'] = self.data['year_month'].copy()
+        self.y = self.lag_features(self.y.iloc[:, :-1], lag, False)
+        self.y['year_month'] = self.data['year_month'].copy()
+        self.y = self.year_month_index(self.y)
+        x_train, x_test, y_train, y_test = self.train_test_split(self.target, test_prop=0.1)
+
+        # Linear Regression Model
+        lr_model = self.reuse_or_fit('linear_regression', self.linear_regression, x_train, y_train)
+        lr_pred = lr_model.predict(x_test)
+        lr_trend = lr_pred[-12:]
+        lr_metrics = self.metric(y_test, lr_pred)
+        lr_metrics['r2'] = r2_score(y_true=y_test, y_pred=lr_pred)
+        lr_forecast = pd.DataFrame(self.iterative_forecast(
+            lr_model, x_test, 12).reset_index().iloc[-12:, 1].values +
+                                   s_t['residuals'].reset_index().iloc[-12:, 1].values +
+                                   s_t['seasonal'].reset_index().iloc[-12:, 1].values)
+
+        # XGBoost
+        self.y = pd.DataFrame(s_t['residuals'])
+        self.y = self.lag_features(self.y, lag, False)
+        x_train, x_test, y_train, y_test = self.train_test_split('residuals', test_prop=0.1)
+        xgb_model = self.reuse_or_fit('xgboost', self.xgboost, x_train, y_train, x_test, y_test)
+        xgb_metrics = self.metric(y_test, xgb_model.predict(x_test))
+        print(xgb_metrics)
+        xgb_forecast = self.iterative_forecast(xgb_model, x_test, 12)
+        xgb_forecast = (pd.DataFrame(xgb_forecast.reset_index()).iloc[:, 1].values +
+                        lr_trend +
+                        s_t['seasonal'].reset_index().iloc[-12:, 1].values)
+        xgb_forecast = pd.DataFrame(xgb_forecast)
+
+        # Seasonal Naives
+        self.y = self.data.copy()
+        self.y = self.year_month_index(self.y)
+        s_naives = self.seasonal_naives(max(lag))
+
+        # SARIMA
+        self.y = self.data.copy()
+        self.y = self.year_month_index(self.y)
+        x_train, x_test, y_train, y_test = self.train_test_split(self.target, test_prop=0.1)
+
+        # Final SARIMA model
+        sarima = self.sarimax(pd.concat([y_train, y_test], axis=0),
+                              self.order[0], self.order[1], self.order[2], self.s_order, trend='ct',
+                              params=self.fitted.get('sarima_params'))
+        self.fitted['sarima_params'] = sarima.params
+        sarima_forecast = sarima.forecast(steps=12)
+
+
+        # XGBoost + SARIMA
+        self.y = self.data.copy()
+        self.y = self.year_month_index(self.y)
+        self.y = pd.concat([sarima.resid, self.y.copy()[self.target], sarima.fittedvalues], axis=1)
+        self.y.columns = ['arima_resid', self.target, 'arima_fitted_values']
+        self.y = self.lag_features(self.y, lag, False)
+        self.y = self.y.drop(columns=[self.target, 'arima_fitted_values'], axis=1)
+        x_train, x_test, y_train, y_test = self.train_test_split('arima_resid', test_prop=0.1)
+        xgb_sarima = self.reuse_or_fit('xgboost_sarima', self.xgboost, x_train, y_train, x_test, y_test)
+        resid_forecast = self.iterative_forecast(xgb_sarima, x_test, 12)
+        final_xgb_arima = (sarima.get_forecast(steps=12).predicted_mean.reset_index().iloc[:, 1] +
+                           resid_forecast.reset_index().iloc[:, 1])
+
+
+        final_df = pd.DataFrame()
+        final_df['year_month'] = pd.date_range(start=self.y.index[-1][:4] + '-2',
+                                               periods=max(lag), freq='MS').strftime('%Y-%m')
+        final_df = pd.concat([
+            final_df,
+            lr_forecast.reset_index().iloc[:, 1],
+            s_naives.reset_index().iloc[:, 1],
+            xgb_forecast.reset_index().iloc[:, 1],
+            sarima_forecast.reset_index().iloc[:, 1],
+            final_xgb_arima.reset_index().iloc[:, 1],
+        ], axis=1)
+        final_df.columns = [
+            'year_month',
+            self.target + ' Linear Regression Forecast',
+            self.target + ' Seasonal Naives Forecast',
+            self.target + ' XGBoost Forecast',
+            self.target + ' SARIMA Forecast',
+            self.target + ' SARIMA' + ' & XGBoost Forecast'
+        ]
+
+        return final_df
+
 # Testing purposes
 # data = pd.read_csv('./data/bls_food.csv')
 # model = Model(df=data, y='PPI Values', order=(1, 1, 0), seasonal_order=(1, 0, 0, 12))
@@ -316,33 +439,102 @@
 # #test_lag = model.lag_features(data,[1, 3, 6, 12], True)
 # test_model = model.model_building()
 #
+# Datasets with the series that are forecasted
+dataset = [
+    './data/bls_food.csv',
+    './data/bls_gas_price.csv',
+    './data/eia_crude_price.csv'
+]
+
+# Found using auto.arima in R
+sarima_order = {
+    'Cpi Values' : [(0, 1, 1), (0, 1, 1, 12)],
+    'PPI Values': [(3, 0, 3), (2, 1, 0, 12)],
+    'Unemployment': [(1, 0, 0), (2, 1, 0, 12)],
+    'Unleaded Gasoline': [(1, 0, 1), (2, 1, 2, 12)],
+    'UK Brent Prices': [(2, 0, 0), (1, 1, 0, 12)],
+    'WTI Prices': [(1, 0, 2), (2, 1, 2, 12)]
+}
+
+
+def limit_threads(threads):
+    """
+    Caps the number of threads used by BLAS, OpenMP and XGBoost in a worker process, so the workers together do not use
+    more threads than there are cores
+    :param threads: Number of threads for each worker
+    """
+
+    for variable in ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']:
+        os.environ[variable] = str(threads)
+
+    threadpool_limits(limits=threads)
+
+
+def train_series(path, column, orders, threads, refit=False):
+    """
+    Builds the models of one series, runs inside a worker process. The stored models of the series are reused unless
+    refit is True, see models.registry.
+    :param path: Path to the csv file with the series
+    :param column: Name of the series
+    :param orders: SARIMA order and seasonal order of the series
+    :param threads: Number of threads the models can use
+    :param refit: Fits every model from scratch if True
+    :return: Name of the series, dataframe with the forecasts, wall time in seconds, 'skipped', 'updated' or 'trained'
+    """
+
+    start = time.perf_counter()
+
+    model = Model(pd.read_csv(path), y=column, order=orders[0], seasonal_order=orders[1], n_jobs=threads)
+    output, status = build_forecast(model, refit=refit)
+
+    return column, output, time.perf_counter() - start, status
+
+
+def train_all(datasets=None, orders=None, max_workers=None, threads_per_job=1,
+              output_path='./data/forecast_data.csv', refit=False):
+    """
+    Builds the models of every series in parallel, one process per series, and writes the forecasts into a csv file
+    :param datasets: List of csv files with the series, defaults to dataset
+    :param orders: Dict with the SARIMA orders of each series to forecast, defaults to sarima_order
+    :param max_workers: Number of processes, defaults to the number of cores divided by threads_per_job
+    :param threads_per_job: Number of threads each process can use
+    :param output_path: Path to the csv file with the forecasts
+    :param refit: Fits every model from scratch if True instead of reusing the stored models
+    :return: Dict with the wall time in seconds of each series
+    """
+
+    datasets = datasets or dataset
+    orders = orders or sarima_order
+    max_workers = max_workers or max(1, (os.cpu_count() or 1) // threads_per_job)
+
+    jobs = [
+        (path, column)
+        for path in datasets
+        for column in pd.read_csv(path, nrows=0).columns[1:-1]
+        if column in orders
+    ]
+
+    results = {}
+    wall_time = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=limit_threads,
+                             initargs=(threads_per_job,)) as executor:
+        futures = [executor.submit(train_series, path, column, orders[column], threads_per_job, refit)
+                   for path, column in jobs]
+
+        for future in as_completed(futures):
+            column, output, seconds, status = future.result()
+            results[column] = output
+            wall_time[column] = seconds
+            print(f'Finished Modeling: {column} in {seconds:.1f}s ({status})')
+
+    # Same column layout as the serial loop, one block of forecasts per series in the order of the datasets
+    result = pd.concat([results[column] for _, column in jobs], axis=1)
+    result.to_csv(output_path)
+
+    return wall_time
+
+
 # Commented out to conserve computational power
-# dataset = [
-#     './data/bls_food.csv',
-#     './data/bls_gas_price.csv',
-#     './data/eia_crude_price.csv'
-# ]
-#
-# # Found using auto.arima in R
-# sarima_order = {
-#     'Cpi Values' : [(0, 1, 1), (0, 1, 1, 12)],
-#     'PPI Values': [(3, 0, 3), (2, 1, 0, 12)],
-#     'Unemployment': [(1, 0, 0), (2, 1, 0, 12)],
-#     'Unleaded Gasoline': [(1, 0, 1), (2, 1, 2, 12)],
-#     'UK Brent Prices': [(2, 0, 0), (1, 1, 0, 12)],
-#     'WTI Prices': [(1, 0, 2), (2, 1, 2, 12)]
-# }
-#
-# result = pd.DataFrame()
-#
-# for path in dataset:
-#     data = pd.read_csv(path)
-#     for column in data.columns[1:-1]:
-#         if column in sarima_order:
-#             print(f'Currently Modeling: {column}')
-#             model = Model(data, y=column, order=sarima_order[column][0],
-#                           seasonal_order=sarima_order[column][1])
-#             output = model.model_building()
-#             result = pd.concat([result, output], axis=1)
-#
-# result.to_csv('./data/forecast_data.csv')
+# if __name__ == '__main__':
+#     train_all(threads_per_job=1)
@@ -0,0 +1,191 @@
+"""
+Local registry of the fitted forecasting models
+
+Each series gets one pickle file with its fitted models, the STL components and lags they were built with, a
+fingerprint of the training data and the forecasts. When the data of a series did not change the stored forecasts are
+returned as they are. When new months were added, or recent months revised, the stored models are reused on the new
+data: the linear regression and XGBoost models forecast from the latest lags and the SARIMA model filters the whole
+series again with its fitted parameters, so nothing is trained. The models are fitted from scratch when the model
+settings changed or after config.refit_months new months.
+
+The best XGBoost hyperparameters found for each series are also written to a small json file next to its pickle file.
+Every series is trained in its own process, so a search reads the files of every series to warm start from the best
+hyperparameters of the earlier runs.
+"""
+import glob
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+import config
+from data_processing.data_store import atomic_write, write_text
+
+
+# Folder with the pickle file of each series
+registry_folder = './models/artifacts'
+
+
+def artifact_path(target, folder=registry_folder):
+    """
+    :param target: Name of the series
+    :param folder: Path to the registry folder
+    :return: Path to the pickle file of the series
+    """
+
+    return os.path.join(folder, re.sub(r'[^a-z0-9]+', '_', target.lower()).strip('_') + '.pkl')
+
+
+def data_fingerprint(data, target):
+    """
+    Hashes the months and values of the series the models are built on
+    :param data: Pandas dataframe with year_month as YYYY-mm, sorted oldest month first
+    :param target: Name of the series
+    :return: Hex string that changes whenever a month or a value changes
+    """
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(target.encode())
+    fingerprint.update(','.join(data['year_month']).encode())
+    fingerprint.update(data[target].to_numpy(dtype=float).tobytes())
+
+    return fingerprint.hexdigest()[:16]
+
+
+def model_settings(model):
+    """
+    :param model: Model of the series
+    :return: Dict with the settings the stored models must have been built with to be reused
+    """
+
+    return {'order': tuple(model.order), 'seasonal_order': tuple(model.s_order), 'lag': list(model.lag)}
+
+
+def params_path(target, folder=registry_folder):
+    """
+    :param target: Name of the series
+    :param folder: Path to the registry folder
+    :return: Path to the json file with the best hyperparameters of the series
+    """
+
+    return artifact_path(target, folder)[:-len('.pkl')] + '.params.json'
+
+
+def load_best_params(folder=registry_folder):
+    """
+    :param folder: Path to the registry folder
+    :return: List of dict with the best hyperparameters stored for every series, the most recently saved last
+    """
+
+    best_params = []
+
+    for path in sorted(glob.glob(os.path.join(folder, '*.params.json')), key=os.path.getmtime):
+        try:
+            with open(path) as file:
+                best_params += [params for params in json.load(file) if params not in best_params]
+        except (OSError, ValueError):
+            # A file deleted or unreadable is skipped, the search still has the random candidates
+            continue
+
+    return best_params
+
+
+def save_best_params(target, best_params, folder=registry_folder):
+    """
+    :param target: Name of the series
+    :param best_params: List of dict with the best hyperparameters found by the searches of the series
+    :param folder: Path to the registry folder
+    """
+
+    os.makedirs(folder, exist_ok=True)
+    text = json.dumps(best_params, default=lambda value: value.item())
+
+    atomic_write(params_path(target, folder), lambda temp_path: write_text(temp_path, text))
+
+
+def load_artifacts(target, folder=registry_folder):
+    """
+    :param target: Name of the series
+    :param folder: Path to the registry folder
+    :return: Dict with the stored artifacts of the series, None if the series was never stored
+    """
+
+    try:
+        with open(artifact_path(target, folder), 'rb') as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_artifacts(artifacts, folder=registry_folder):
+    """
+    :param artifacts: Dict with the artifacts of a series, as built by build_forecast
+    :param folder: Path to the registry folder
+    """
+
+    os.makedirs(folder, exist_ok=True)
+    path = artifact_path(artifacts['target'], folder)
+
+    atomic_write(path, lambda temp_path: write_pickle(temp_path, artifacts))
+
+
+def write_pickle(path, artifacts):
+    """
+    :param path: Path to the pickle file
+    :param artifacts: Dict with the artifacts of a series
+    """
+
+    with open(path, 'wb') as file:
+        pickle.dump(artifacts, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def build_forecast(model, refit=False, folder=registry_folder, refit_months=config.refit_months):
+    """
+    Returns the forecasts of a series, reusing the stored models whenever possible
+    :param model: Model of the series
+    :param refit: Fits every model from scratch if True
+    :param folder: Path to the registry folder
+    :param refit_months: Number of new months after which the models are fitted from scratch
+    :return: Dataframe with the forecasts, and 'skipped', 'updated' or 'trained'
+    """
+
+    fingerprint = data_fingerprint(model.data, model.target)
+    settings = model_settings(model)
+    stored = None if refit else load_artifacts(model.target, folder)
+
+    if stored is not None and stored['settings'] != settings:
+        stored = None
+
+    if stored is not None and stored['fingerprint'] == fingerprint:
+        return stored['forecast'], 'skipped'
+
+    # The hyperparameter searches start from the best hyperparameters of every series trained before
+    model.warm_params = load_best_params(folder)
+
+    if stored is not None and len(model.data) - stored['trained_months'] < refit_months:
+        forecast = model.model_building(fitted=stored['models'])
+        trained_months = stored['trained_months']
+        status = 'updated'
+    else:
+        forecast = model.model_building()
+        trained_months = len(model.data)
+        status = 'trained'
+
+    save_artifacts({
+        'target': model.target,
+        'settings': settings,
+        'fingerprint': fingerprint,
+        'months': len(model.data),
+        'last_month': model.data['year_month'].iloc[-1],
+        'trained_months': trained_months,
+        'models': model.fitted,
+        'stl': model.stl_components,
+        'forecast': forecast,
+        'saved_at': time.time()
+    }, folder)
+
+    if model.best_params:
+        save_best_params(model.target, model.best_params, folder)
+
+    return forecast, status
@@ -0,0 +1,5 @@
+# The modules of the dashboard are imported from the root of the repository, as the app and gunicorn run from there
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
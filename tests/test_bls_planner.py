@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from data_processing.bls_planner import chunk, plan_requests, stitch_responses
+
+
+def observations(year, months, value=1.0, annual=False):
+    """
+    :return: BLS observations of one year, newest month first like the API, with the annual average if annual is True
+    """
+
+    data = [{'year': str(year), 'period': 'M13', 'value': '99.0'}] if annual else []
+
+    return data + [{'year': str(year), 'period': f'M{month:02d}', 'value': str(value + month)}
+                   for month in sorted(months, reverse=True)]
+
+
+def response(series):
+    return {'status': 'REQUEST_SUCCEEDED', 'Results': {'series': [
+        {'seriesID': series_id, 'data': data} for series_id, data in series.items()]}}
+
+
+def test_chunk():
+    assert chunk(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert chunk([], 2) == []
+
+
+def test_plan_requests_splits_series_and_years():
+    series = [f'S{n}' for n in range(120)]
+    requests = plan_requests(series, 1985, 2025, max_series=50, max_years=20)
+
+    year_ranges = [('1985', '2004'), ('2005', '2024'), ('2025', '2025')]
+    assert [(request['startyear'], request['endyear']) for request in requests] == year_ranges * 3
+    assert [len(request['seriesid']) for request in requests] == [50] * 3 + [50] * 3 + [20] * 3
+
+    # Every series is requested over every year exactly once
+    covered = [(series_id, request['startyear']) for request in requests for series_id in request['seriesid']]
+    assert len(covered) == len(set(covered)) == 120 * 3
+
+
+def test_plan_requests_within_limits():
+    assert plan_requests(['A', 'B'], 2006, 2025, max_series=50, max_years=20) == [
+        {'seriesid': ['A', 'B'], 'startyear': '2006', 'endyear': '2025'}]
+
+
+def test_stitch_responses_joins_ragged_series_on_months():
+    # A starts earlier and covers both year chunks, B starts in 2024 and misses March
+    responses = [
+        response({'A': observations(2023, range(1, 13), annual=True)}),
+        response({'A': observations(2024, range(1, 5), 100.0, annual=True), 'B': observations(2024, [1, 2, 4], 200.0)}),
+    ]
+
+    df = stitch_responses(responses, ['A', 'B'], ['Series A', 'Series B'])
+
+    # Newest month first, one row per month, the annual averages are skipped
+    assert list(df.columns) == ['Series A', 'Series B', 'year_month']
+    assert df['year_month'].tolist() == [f'2024-{month:02d}' for month in range(4, 0, -1)] + \
+        [f'2023-{month:02d}' for month in range(12, 0, -1)]
+    assert 99.0 not in df['Series A'].tolist()
+
+    rows = df.set_index('year_month')
+    assert rows.loc['2024-04', 'Series A'] == 104.0
+    assert rows.loc['2024-04', 'Series B'] == 204.0
+    assert np.isnan(rows.loc['2024-03', 'Series B'])
+    assert df.loc[df['year_month'].str.startswith('2023'), 'Series B'].isna().sum() == 12
+
+
+def test_stitch_responses_raises_on_failed_request():
+    failed = {'status': 'REQUEST_NOT_PROCESSED', 'message': ['Daily threshold reached']}
+
+    with pytest.raises(ValueError, match='Daily threshold reached'):
+        stitch_responses([response({'A': observations(2024, [1])}), failed], ['A'], ['Series A'])
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from tenacity import wait_none
+import data_processing.concurrent_fetch as concurrent_fetch
+from data_processing.concurrent_fetch import Fetcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    /item/<n> answers after a delay that shrinks with n, so later items finish first
+    /flaky/<failures>/<key> answers 503 for the first failures requests of the key
+    /missing answers 404
+    """
+
+    def do_GET(self):
+        self.server.hits[self.path] += 1
+        parts = self.path.strip('/').split('/')
+
+        if parts[0] == 'item':
+            time.sleep(0.02 * (10 - int(parts[1])))
+            self.send_json(200, {'item': int(parts[1])})
+        elif parts[0] == 'flaky' and self.server.hits[self.path] <= int(parts[1]):
+            self.send_json(503, {'error': 'unavailable'})
+        elif parts[0] == 'flaky':
+            self.send_json(200, {'key': parts[2]})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def send_json(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.hits = Counter()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    # The retries are sent right away instead of after the exponential backoff
+    monkeypatch.setattr(concurrent_fetch, 'wait_exponential', lambda **kwargs: wait_none())
+
+    return Fetcher(max_workers=4, retries=3, timeout=5)
+
+
+def url(server, path):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+def test_get_all_keeps_order(server, fetcher):
+    urls = [url(server, f'/item/{n}') for n in range(10)]
+
+    assert fetcher.get_all(urls) == [{'item': n} for n in range(10)]
+
+
+def test_retries_server_errors(server, fetcher):
+    assert fetcher.get_json(url(server, '/flaky/2/a')) == {'key': 'a'}
+    assert server.hits['/flaky/2/a'] == 3
+
+
+def test_gives_up_after_the_last_attempt(server, fetcher):
+    with pytest.raises(requests.HTTPError) as error:
+        fetcher.get_json(url(server, '/flaky/5/b'))
+
+    assert error.value.response.status_code == 503
+    assert server.hits['/flaky/5/b'] == 3
+
+
+def test_client_errors_are_not_retried(server, fetcher):
+    with pytest.raises(requests.HTTPError):
+        fetcher.get_json(url(server, '/missing'))
+
+    assert server.hits['/missing'] == 1
+
+
+def test_stream_retried_on_server_errors(server, fetcher):
+    body = fetcher.get_stream(url(server, '/flaky/1/c'), lambda chunks: json.loads(b''.join(chunks)), chunk_size=4)
+
+    assert body == {'key': 'c'}
+    assert server.hits['/flaky/1/c'] == 2
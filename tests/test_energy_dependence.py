@@ -0,0 +1,56 @@
+import pandas as pd
+import layout_functions.energy_dependence as energy_dependence
+
+
+def yearly_frame(scale=1.0):
+    return pd.DataFrame({
+        'year': [2020, 2021, 2022],
+        'United States': [11.0 * scale, 11.5, 12.0],
+        'OECD': [14.0, 14.2, 14.5],
+        'Non-OECD': [20.0, 20.5, 21.0],
+        'OPEC': [30.0, 31.0, 32.0]
+    })
+
+
+def count_classify_calls(monkeypatch):
+    calls = []
+    classify_country = energy_dependence.classify_country
+
+    def counted(df, prod_cons):
+        calls.append(prod_cons)
+        return classify_country(df, prod_cons)
+
+    monkeypatch.setattr(energy_dependence, 'classify_country', counted)
+    monkeypatch.setattr(energy_dependence, 'EXPANSION_CACHE', {})
+
+    return calls
+
+
+def test_expansion_computed_once_per_frame(monkeypatch):
+    calls = count_classify_calls(monkeypatch)
+
+    # Equal frames built separately share the expansion, a frame with other values gets its own
+    energy_dependence.map_graph(yearly_frame(), 'Million Barrels/Day', 'Production')
+    energy_dependence.map_graph(yearly_frame(), 'Million Barrels/Day', 'Production')
+    assert len(calls) == 1
+
+    energy_dependence.map_graph(yearly_frame(2.0), 'Million Barrels/Day', 'Production')
+    assert len(calls) == 2
+
+
+def test_expansion_survives_cache_cleared_by_another_thread(monkeypatch):
+    calls = count_classify_calls(monkeypatch)
+
+    class ClearedCache(dict):
+        # Another thread clearing the cache right after the entry is stored
+        def __setitem__(self, key, value):
+            pass
+
+    monkeypatch.setattr(energy_dependence, 'EXPANSION_CACHE', ClearedCache())
+
+    expansion = energy_dependence.country_expansion(yearly_frame(), 'Million Barrels/Day')
+
+    assert expansion['global_max'] == 32.0
+    assert set(expansion['data']['Group']) == {'United States', 'OECD', 'Non-OECD', 'OPEC'}
+    assert 'Saudi Arabia' in set(expansion['data']['Country'])
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+import types
+from datetime import datetime
+import pandas as pd
+import config
+import data_processing.fetch_data as fetch_data
+from data_processing.data_store import upsert_csv
+from data_processing.fetch_data import Updater, revision_start
+
+
+def test_revision_window_of_monthly_series():
+    assert revision_start(pd.Period('2025-07', 'M'), config.bls_food, 3) == pd.Period('2025-04', 'M')
+    assert revision_start(pd.Period('2025-07', 'M'), config.eia_petroleum_price, 3) == pd.Period('2025-04', 'M')
+
+
+def test_revision_window_of_steo_covers_the_forecast():
+    last_actual = pd.Period.now('M') - 1
+    forecast_end = pd.Period(f'{last_actual.year + 1}-12', 'M')
+
+    assert revision_start(forecast_end, config.eia_crude_production, 3) == last_actual - 3
+
+
+def test_update_dataset_requests_steo_from_last_actual_month(tmp_path):
+    data_dir = str(tmp_path)
+    last_actual = pd.Period.now('M') - 1
+    months = pd.period_range(last_actual - 24, f'{last_actual.year + 1}-12', freq='M')
+    upsert_csv(data_dir, 'eia_emission', pd.DataFrame({
+        'CO2 Emission from Petroleum Products': 1.0, 'year_month': months.strftime('%Y-%m')}))
+
+    # Updater without the api keys, the EIA request is replaced by the revised release
+    requested = []
+
+    def retrieve_data_eia(series, series_name, start_month=None):
+        requested.append(start_month)
+        return pd.DataFrame({series_name[0]: 2.0, 'year_month': months.strftime('%Y-%m')})
+
+    updater = Updater.__new__(Updater)
+    updater.retrieve_data_eia = retrieve_data_eia
+
+    updater.update_dataset('eia_emission', 'eia', config.eia_petro_emission, config.eia_petro_emission_name,
+                           data_dir=data_dir, revision_months=3)
+
+    stored = pd.read_csv(tmp_path / 'eia_emission.csv', index_col=0)
+    revised = stored.loc[stored['year_month'] >= str(last_actual - 3)]
+
+    assert requested == [str(last_actual - 3)]
+    assert (revised['CO2 Emission from Petroleum Products'] == 2.0).all()
+    assert revised['year_month'].max() == months[-1].strftime('%Y-%m')
+
+
+def test_year_window_taken_when_updater_is_created(monkeypatch):
+    class NewYear(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2027, 1, 1)
+
+    monkeypatch.setattr(fetch_data, 'api_keys', types.SimpleNamespace(bls_api_key='', eia_api_key=''))
+    monkeypatch.setattr(fetch_data, 'datetime', NewYear)
+
+    updater = Updater()
+    assert (updater.start_year, updater.end_year) == (2027 - config.history_years, 2027)
@@ -0,0 +1,36 @@
+import types
+from layout_functions.figure_cache import FigureCache
+
+
+class Holder:
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def current(self):
+        return self.snapshot
+
+
+def test_stale_snapshot_does_not_drop_warmed_pages():
+    old, new = types.SimpleNamespace(version='old'), types.SimpleNamespace(version='new')
+    holder = Holder(old)
+    builds = []
+
+    def builder(page, snapshot, start, end):
+        builds.append((page, snapshot.version))
+        return [page + ' ' + snapshot.version]
+
+    cache = FigureCache(builder, holder)
+    cache.warm(['a', 'b'])
+
+    holder.snapshot = new
+    cache.warm(['a', 'b'], new)
+
+    # A request that read the old snapshot before the swap gets its page built from it, without caching it
+    assert cache.get('a', snapshot=old) == ['a old']
+    assert cache.get('a', snapshot=old) == ['a old']
+
+    # The pages of the new snapshot are still cached
+    assert cache.get('a') == ['a new']
+    assert cache.get('b') == ['b new']
+    assert builds == [('a', 'old'), ('b', 'old'), ('a', 'new'), ('b', 'new'), ('a', 'old'), ('a', 'old')]
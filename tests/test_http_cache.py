@@ -0,0 +1,36 @@
+import os
+from layout_functions.http_cache import code_version, code_folders, snapshot_etag
+
+
+def code_tree(root):
+    for folder in code_folders:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    with open(os.path.join(root, 'layout.py'), 'w') as file:
+        file.write('pages = []\n')
+
+    with open(os.path.join(root, 'assets', 'style.css'), 'w') as file:
+        file.write('body {}\n')
+
+
+def test_redeploy_changes_code_version(tmp_path):
+    root = str(tmp_path)
+    code_tree(root)
+    before = code_version(root)
+
+    # Files other than the code, like the csv files, do not change it
+    with open(os.path.join(root, 'data.csv'), 'w') as file:
+        file.write('year_month\n')
+    assert code_version(root) == before
+
+    with open(os.path.join(root, 'layout.py'), 'w') as file:
+        file.write('pages = ["Forecasting"]\n')
+    assert code_version(root) != before
+
+
+def test_layout_etag_follows_code_and_snapshot():
+    etag = snapshot_etag('v1', '/_dash-layout', code='a')
+
+    assert etag == snapshot_etag('v1', '/_dash-layout', code='a')
+    assert etag != snapshot_etag('v1', '/_dash-layout', code='b')
+    assert etag != snapshot_etag('v2', '/_dash-layout', code='a')
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    :param module: Name of the module imported in a new interpreter
+    :return: Dict with the cumulative import time in microseconds of every module imported
+    """
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=root,
+                            capture_output=True, text=True, check=True)
+    rows = [line[len('import time:'):].split('|') for line in result.stderr.splitlines()
+            if line.startswith('import time:') and 'cumulative' not in line]
+
+    return {name.strip(): int(cumulative) for _, cumulative, name in rows}
+
+
+def test_layout_import_skips_model_libraries():
+    # The first import writes the decompositions and correlations of the snapshot if they are missing, a server
+    # serving the stored results must not load statsmodels or scipy
+    subprocess.run([sys.executable, '-c', 'import layout'], cwd=root, capture_output=True, check=True)
+
+    times = import_times('layout')
+    packages = {name.split('.')[0] for name in times}
+
+    assert not packages & {'statsmodels', 'scipy', 'sklearn', 'xgboost'}
+    assert len(times) < 2500
+    assert times['layout'] < 20 * 10 ** 6
@@ -0,0 +1,32 @@
+import numpy as np
+from data_processing.bls_planner import parse_series
+from data_processing.preprocessing.normalize import bls_months, record_columns, to_numbers
+
+
+def test_bls_months_leave_annual_averages_without_month():
+    months = bls_months(['2024', '2024', '2023', '2023'], ['M13', 'M12', 'M01', 'Q01'])
+
+    assert list(months.isna()) == [True, False, False, True]
+    assert [str(month) for month in months[~months.isna()]] == ['2024-12', '2023-01']
+
+
+def test_record_columns_fill_missing_keys():
+    columns = record_columns([{'year': '2024', 'value': '1.5'}, {'year': '2023'}], ['year', 'value'])
+
+    assert list(columns['year']) == ['2024', '2023']
+    assert list(columns['value']) == ['1.5', None]
+
+
+def test_to_numbers_without_value():
+    assert np.isnan(to_numbers(['1.5', '-', None])[1:]).all()
+
+
+def test_parse_series_skips_annual_averages():
+    months, values = parse_series([
+        {'year': '2024', 'period': 'M13', 'value': '9.0'},
+        {'year': '2024', 'period': 'M12', 'value': '2.5'},
+        {'year': '2024', 'period': 'M11', 'value': '-'},
+    ])
+
+    assert [str(month) for month in months] == ['2024-12', '2024-11']
+    assert values[0] == 2.5 and np.isnan(values[1])
@@ -0,0 +1,78 @@
+import os
+import sys
+import types
+import fcntl
+import pytest
+from data_processing.data_store import store_folder, write_text
+from data_processing.refresher import Refresher, run_locked, update_due
+
+
+def test_update_lock_is_taken_by_one_process(tmp_path):
+    data_dir = str(tmp_path)
+    runs = []
+
+    # A worker holding the lock, flock locks are held per open file, like a lock held by another process
+    assert run_locked(data_dir, lambda: runs.append(run_locked(data_dir, lambda: runs.append('inner'))))
+    assert runs == [False]
+
+    # Released once the holder is done
+    assert run_locked(data_dir, lambda: runs.append('after'))
+    assert runs == [False, 'after']
+
+
+def test_lock_released_when_update_fails(tmp_path):
+    data_dir = str(tmp_path)
+
+    def fail():
+        raise RuntimeError('API down')
+
+    try:
+        run_locked(data_dir, fail)
+    except RuntimeError:
+        pass
+
+    with open(os.path.join(data_dir, store_folder, 'UPDATE.lock')) as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_update_due_follows_stamp(tmp_path):
+    data_dir = str(tmp_path)
+    assert update_due(data_dir, 3600)
+
+    os.makedirs(os.path.join(data_dir, store_folder))
+    stamp = os.path.join(data_dir, store_folder, 'UPDATED')
+    write_text(stamp, '')
+    assert not update_due(data_dir, 3600)
+
+    os.utime(stamp, (0, 0))
+    assert update_due(data_dir, 3600)
+
+
+def test_failed_update_waits_for_the_refresh_interval(tmp_path, monkeypatch):
+    data_dir = str(tmp_path)
+    calls = []
+
+    class FailingUpdater:
+        def update_all(self, data_dir, incremental=True):
+            calls.append(data_dir)
+            raise RuntimeError('BLS daily threshold reached')
+
+    fetch_data = types.ModuleType('data_processing.fetch_data')
+    fetch_data.Updater = FailingUpdater
+    monkeypatch.setitem(sys.modules, 'data_processing.fetch_data', fetch_data)
+
+    holder = types.SimpleNamespace(current=lambda: types.SimpleNamespace(data_dir=data_dir, version=None))
+    refresher = Refresher(holder, interval=0, run_updater=True, update_interval=3600)
+
+    with pytest.raises(RuntimeError):
+        refresher.refresh()
+
+    # The next watches only read the store until the refresh interval has passed
+    for _ in range(3):
+        assert not refresher.refresh()
+    assert len(calls) == 1
+
+    os.utime(os.path.join(data_dir, store_folder, 'UPDATED'), (0, 0))
+    with pytest.raises(RuntimeError):
+        refresher.refresh()
+    assert len(calls) == 2
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from models.models import Model
+from models.registry import build_forecast, load_best_params, save_best_params
+
+
+class StubModel:
+    """
+    Stands in for models.models.Model, records the hyperparameters it was warm started with
+    """
+
+    order = (1, 0, 0)
+    s_order = (0, 1, 0, 12)
+    lag = [1, 2]
+
+    def __init__(self, target, found):
+        self.target = target
+        self.data = pd.DataFrame({'year_month': ['2024-01', '2024-02'], target: [1.0, 2.0]})
+        self.found = found
+        self.warm_params = []
+        self.best_params = []
+        self.fitted = {}
+        self.stl_components = None
+
+    def model_building(self, fitted=None):
+        self.seen = list(self.warm_params)
+        self.best_params = [self.found]
+        return pd.DataFrame({self.target: [0.0]})
+
+
+def test_best_params_shared_between_series(tmp_path):
+    folder = str(tmp_path)
+    first = {'learning_rate': 0.1, 'max_depth': 3}
+    second = {'learning_rate': 0.3, 'max_depth': 5}
+
+    # Each series runs in its own process, only the registry folder carries the hyperparameters over
+    build_forecast(StubModel('Cpi Values', first), folder=folder)
+    model = StubModel('WTI Prices', second)
+    build_forecast(model, folder=folder)
+
+    assert model.seen == [first]
+    assert load_best_params(folder) == [first, second]
+
+
+def test_best_params_round_trip(tmp_path):
+    params = [{'learning_rate': 0.5, 'max_depth': np.int64(7), 'lambda': 10}]
+    save_best_params('Cpi Values', params, str(tmp_path))
+
+    assert load_best_params(str(tmp_path)) == [{'learning_rate': 0.5, 'max_depth': 7, 'lambda': 10}]
+    assert load_best_params(str(tmp_path / 'missing')) == []
+
+
+def test_search_starts_from_stored_params():
+    months = pd.period_range('2020-01', periods=36, freq='M').strftime('%Y-%m')
+    model = Model(pd.DataFrame({'Cpi Values': np.arange(36.0), 'year_month': months}), 'Cpi Values',
+                  (1, 0, 0), (0, 1, 0, 12))
+    stored = {'learning_rate': 0.75, 'max_depth': 7, 'lambda': 1000, 'alpha': 10, 'gamma': 0.7}
+    model.warm_params = [stored]
+
+    candidates = model.search_candidates(5)
+
+    assert candidates[0] == {key: [value] for key, value in stored.items()}
+    assert len(candidates) == 5
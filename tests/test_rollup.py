@@ -0,0 +1,25 @@
+import pandas as pd
+from data_processing.rollup import build_rollups, rollup
+
+
+def monthly_frame():
+    return pd.DataFrame({'OPEC': [float(month) for month in range(1, 25)],
+                         'year_month': pd.date_range('2023-01-01', periods=24, freq='MS')})
+
+
+def test_snapshot_only_builds_the_yearly_means():
+    df = monthly_frame()
+    rollups = build_rollups({'eia_api_crude_production': df})
+
+    assert list(rollups) == [('eia_api_crude_production', 'year', 'mean')]
+    yearly = rollups[('eia_api_crude_production', 'year', 'mean')]
+    assert yearly['year'].tolist() == ['2023', '2024']
+    assert yearly['OPEC'].tolist() == [6.5, 18.5]
+    assert list(df.columns) == ['OPEC', 'year_month']
+
+
+def test_rollup_by_quarter():
+    quarterly = rollup(monthly_frame(), 'quarter', 'sum')
+
+    assert quarterly['quarter'].tolist()[:2] == ['2023Q1', '2023Q2']
+    assert quarterly['OPEC'].tolist()[:2] == [6.0, 15.0]
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from data_processing.data_store import load_frame, upsert_csv, write_snapshot
+from data_processing.snapshot import month_index, month_slice
+
+
+def test_store_frames_are_indexed_without_copy(tmp_path):
+    data_dir = str(tmp_path)
+    months = pd.period_range('2020-01', '2021-12', freq='M')
+    upsert_csv(data_dir, 'prices', pd.DataFrame({'Eggs': np.arange(len(months), dtype='float64'),
+                                                 'year_month': months.strftime('%Y-%m')}))
+
+    df = load_frame('prices', data_dir, write_snapshot(data_dir))
+    values = df['Eggs'].to_numpy()
+
+    # The csv file is kept newest first, the Feather file oldest first
+    assert df['year_month'].is_monotonic_increasing
+
+    indexed = month_index(df)
+    assert np.shares_memory(values, indexed['Eggs'].to_numpy())
+    assert isinstance(df.index, pd.RangeIndex)
+    assert month_slice(indexed, '2021-01', '2021-03')['Eggs'].tolist() == [12.0, 13.0, 14.0]
+
+
+def test_month_index_sorts_unsorted_frames():
+    df = pd.DataFrame({'value': [3.0, 1.0, 2.0],
+                       'year_month': pd.to_datetime(['2020-03', '2020-01', '2020-02'])})
+
+    indexed = month_index(df)
+
+    assert indexed['value'].tolist() == [1.0, 2.0, 3.0]
+    assert list(indexed.index.strftime('%Y-%m')) == ['2020-01', '2020-02', '2020-03']